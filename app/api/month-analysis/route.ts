@@ -2,23 +2,89 @@
 // 100% DATA-DRIVEN - Analyzes 2 years of historical data
 
 import { NextRequest, NextResponse } from 'next/server';
+import { promises as fs } from 'fs';
+import path from 'path';
 import { fetchHistoricalData, fetchMultipleStocks } from '@/lib/data-fetcher';
 import { SECTORS, getAllSectorStocks, getSector } from '@/lib/sector-stocks';
 import {
   analyzeStockPattern,
   analyzeMonth,
+  patternsFromSeasonality,
+  SeasonalityArtifact,
   StockMonthlyPattern,
 } from '@/lib/month-analysis';
 
-// Cache for historical analysis (valid for 1 hour)
+// Precomputed seasonality (scripts/analyze_patterns.py --seasonality --seasonality-json);
+// when present it is served for the stocks it covers, and only the rest are fetched and analyzed
+const SEASONALITY_PATH = process.env.MONTH_SEASONALITY_PATH ||
+  path.join(process.cwd(), 'data', 'month-seasonality.json');
+
+const SUPPORTED_SEASONALITY_VERSION = 1;
+
+// History analyzed live, and the artifact --period covering the same window:
+// artifact and live stocks are ranked together, so they must share a data basis
+const LIVE_HISTORY_DAYS = 730;
+const LIVE_PERIOD = '2y';
+
+// Patterns from the artifact, reused until the file changes
+let seasonalityCache: {
+  mtimeMs: number;
+  generatedAt: string;
+  stockPatterns: Map<string, StockMonthlyPattern>;
+  covered: Set<string>;
+} | null = null;
+
+async function loadSeasonality() {
+  try {
+    const stat = await fs.stat(SEASONALITY_PATH);
+    if (seasonalityCache && seasonalityCache.mtimeMs === stat.mtimeMs) {
+      return seasonalityCache;
+    }
+    const artifact = JSON.parse(await fs.readFile(SEASONALITY_PATH, 'utf-8')) as SeasonalityArtifact;
+    if (artifact.version !== SUPPORTED_SEASONALITY_VERSION) {
+      console.log(`Ignoring seasonality artifact version ${artifact.version}`);
+      return null;
+    }
+    if (artifact.meta?.period !== LIVE_PERIOD) {
+      console.log(`Ignoring seasonality artifact built from ${artifact.meta?.period} of history (live analysis uses ${LIVE_PERIOD})`);
+      return null;
+    }
+    // Prices come from live quotes, not the artifact's closes as of when it was generated
+    const { stockPatterns, covered } = patternsFromSeasonality(artifact);
+    seasonalityCache = { mtimeMs: stat.mtimeMs, generatedAt: artifact.generated_at, stockPatterns, covered };
+    return seasonalityCache;
+  } catch {
+    return null; // No artifact - analyze live
+  }
+}
+
+// Cache for historical analysis of the stocks in `symbols` (valid for 1 hour)
 let analysisCache: {
   timestamp: number;
+  symbols: string;
   stockPatterns: Map<string, StockMonthlyPattern>;
   currentPrices: Map<string, number>;
 } | null = null;
 
+// Live quotes of the stocks served from the artifact (valid for 1 hour)
+let quoteCache: {
+  timestamp: number;
+  symbols: string;
+  prices: Map<string, number>;
+} | null = null;
+
 const CACHE_DURATION = 60 * 60 * 1000; // 1 hour
 
+// Latest close of each symbol
+async function fetchQuotes(symbols: string[]): Promise<Map<string, number>> {
+  const quotes = await fetchMultipleStocks(symbols, 5, 300);
+  const prices = new Map<string, number>();
+  quotes.forEach((data, symbol) => {
+    prices.set(symbol, data.close);
+  });
+  return prices;
+}
+
 // Delay helper
 const delay = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
 
@@ -39,19 +105,28 @@ export async function GET(request: NextRequest) {
       return NextResponse.json({ error: 'Invalid month (1-12)' }, { status: 400 });
     }
 
+    // refresh=true bypasses the precomputed artifact and analyzes live
+    const precomputed = refreshParam === 'true' ? null : await loadSeasonality();
+
+    // Get all unique stocks from sectors
+    const allStocks = getAllSectorStocks();
+    const limit = limitParam ? parseInt(limitParam) : allStocks.length;
+    const requestedStocks = allStocks.slice(0, limit);
+
+    // Stocks the artifact did not analyze are analyzed live
+    const stocksToAnalyze = precomputed
+      ? requestedStocks.filter(symbol => !precomputed.covered.has(symbol))
+      : requestedStocks;
+    const stocksKey = stocksToAnalyze.join(',');
+
     // Check if we need to refresh cache
-    const shouldRefresh = refreshParam === 'true' ||
+    const shouldRefresh = stocksToAnalyze.length > 0 && (refreshParam === 'true' ||
       !analysisCache ||
-      Date.now() - analysisCache.timestamp > CACHE_DURATION;
+      analysisCache.symbols !== stocksKey ||
+      Date.now() - analysisCache.timestamp > CACHE_DURATION);
 
     if (shouldRefresh) {
       console.log('Building monthly analysis cache (data-driven)...');
-
-      // Get all unique stocks from sectors
-      const allStocks = getAllSectorStocks();
-      const limit = limitParam ? parseInt(limitParam) : allStocks.length;
-      const stocksToAnalyze = allStocks.slice(0, limit);
-
       console.log(`Analyzing ${stocksToAnalyze.length} stocks...`);
 
       // Fetch historical data for all stocks (2 years)
@@ -64,7 +139,7 @@ export async function GET(request: NextRequest) {
         const batchResults = await Promise.all(
           batch.map(async (symbol) => {
             try {
-              const historical = await fetchHistoricalData(symbol, 730); // 2 years
+              const historical = await fetchHistoricalData(symbol, LIVE_HISTORY_DAYS); // 2 years
               if (historical.length >= 200) {
                 const pattern = analyzeStockPattern(symbol, historical);
                 return { symbol, pattern };
@@ -96,20 +171,12 @@ export async function GET(request: NextRequest) {
 
       // Fetch current prices
       console.log('Fetching current prices...');
-      const currentPrices = await fetchMultipleStocks(
-        Array.from(stockPatterns.keys()),
-        5,
-        300
-      );
-
-      const priceMap = new Map<string, number>();
-      currentPrices.forEach((data, symbol) => {
-        priceMap.set(symbol, data.close);
-      });
+      const priceMap = await fetchQuotes(Array.from(stockPatterns.keys()));
 
       // Update cache
       analysisCache = {
         timestamp: Date.now(),
+        symbols: stocksKey,
         stockPatterns,
         currentPrices: priceMap
       };
@@ -117,12 +184,38 @@ export async function GET(request: NextRequest) {
       console.log(`Cache built with ${stockPatterns.size} stocks`);
     }
 
+    // Artifact patterns for the requested stocks it covers, live patterns for the rest
+    const stockPatterns = new Map<string, StockMonthlyPattern>();
+    const currentPrices = new Map<string, number>();
+    if (precomputed) {
+      const servedStocks = requestedStocks.filter(symbol => precomputed.stockPatterns.has(symbol));
+      const quotesKey = servedStocks.join(',');
+      if (servedStocks.length > 0 && (!quoteCache ||
+        quoteCache.symbols !== quotesKey ||
+        Date.now() - quoteCache.timestamp > CACHE_DURATION)) {
+        console.log(`Fetching current prices for ${servedStocks.length} precomputed stocks...`);
+        quoteCache = { timestamp: Date.now(), symbols: quotesKey, prices: await fetchQuotes(servedStocks) };
+      }
+      servedStocks.forEach(symbol => {
+        stockPatterns.set(symbol, precomputed.stockPatterns.get(symbol)!);
+        const price = quoteCache?.prices.get(symbol);
+        if (price !== undefined) {
+          currentPrices.set(symbol, price);
+        }
+      });
+    }
+    const live = stocksToAnalyze.length > 0 ? analysisCache : null;
+    if (live) {
+      live.stockPatterns.forEach((pattern, symbol) => stockPatterns.set(symbol, pattern));
+      live.currentPrices.forEach((price, symbol) => currentPrices.set(symbol, price));
+    }
+
     // Run analysis for requested month
     const result = analyzeMonth(
       month,
       year,
-      analysisCache!.stockPatterns,
-      analysisCache!.currentPrices
+      stockPatterns,
+      currentPrices
     );
 
     // Filter by sector if specified
@@ -147,8 +240,11 @@ export async function GET(request: NextRequest) {
     // Return full analysis
     return NextResponse.json({
       ...result,
-      cacheAge: analysisCache ? Math.round((Date.now() - analysisCache.timestamp) / 1000) : 0,
-      totalStocksAnalyzed: analysisCache?.stockPatterns.size || 0
+      source: precomputed ? (live ? 'artifact+live' : 'artifact') : 'live',
+      generatedAt: precomputed?.generatedAt,
+      cacheAge: live ? Math.round((Date.now() - live.timestamp) / 1000) : 0,
+      liveStocks: stocksToAnalyze.length,
+      totalStocksAnalyzed: stockPatterns.size
     });
 
   } catch (error) {
@@ -192,7 +288,7 @@ export async function POST(request: NextRequest) {
 
     for (const symbol of stocksToAnalyze) {
       try {
-        const historical = await fetchHistoricalData(symbol, 730);
+        const historical = await fetchHistoricalData(symbol, LIVE_HISTORY_DAYS);
         if (historical.length >= 200) {
           const pattern = analyzeStockPattern(symbol, historical);
           if (pattern) {
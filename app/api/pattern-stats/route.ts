@@ -0,0 +1,82 @@
+// API Route: /api/pattern-stats
+// Serves the pattern statistics artifact written by scripts/analyze_patterns.py --output
+// (no analysis runs on request - regenerate the file to refresh it)
+
+import { NextRequest, NextResponse } from 'next/server';
+import { promises as fs } from 'fs';
+import path from 'path';
+
+const ARTIFACT_PATH = process.env.PATTERN_STATS_PATH ||
+  path.join(process.cwd(), 'data', 'pattern-stats.json');
+
+const SUPPORTED_VERSION = 1;
+
+interface ArtifactTable {
+  columns: string[];
+  rows: (string | number | null)[][];
+}
+
+interface PatternArtifact {
+  version: number;
+  generated_at: string;
+  meta: Record<string, unknown>;
+  tables: Record<string, ArtifactTable>;
+}
+
+// Parsed artifact, reused until the file changes
+let artifactCache: { mtimeMs: number; artifact: PatternArtifact } | null = null;
+
+async function loadArtifact(): Promise<PatternArtifact> {
+  const stat = await fs.stat(ARTIFACT_PATH);
+  if (artifactCache && artifactCache.mtimeMs === stat.mtimeMs) {
+    return artifactCache.artifact;
+  }
+  const artifact = JSON.parse(await fs.readFile(ARTIFACT_PATH, 'utf-8')) as PatternArtifact;
+  if (artifact.version !== SUPPORTED_VERSION) {
+    throw new Error(`Unsupported artifact version ${artifact.version}`);
+  }
+  artifactCache = { mtimeMs: stat.mtimeMs, artifact };
+  return artifact;
+}
+
+// Column-oriented table -> array of objects, optionally for one analyzer
+function tableRecords(table: ArtifactTable, analyzer: string | null) {
+  const analyzerIndex = table.columns.indexOf('analyzer');
+  return table.rows
+    .filter(row => !analyzer || row[analyzerIndex] === analyzer)
+    .map(row => Object.fromEntries(table.columns.map((column, i) => [column, row[i]])));
+}
+
+export async function GET(request: NextRequest) {
+  const searchParams = request.nextUrl.searchParams;
+  const analyzer = searchParams.get('analyzer');
+  const tableParam = searchParams.get('table');
+
+  let artifact: PatternArtifact;
+  try {
+    artifact = await loadArtifact();
+  } catch (error) {
+    return NextResponse.json({
+      error: 'Pattern statistics not available',
+      details: String(error),
+      hint: 'Run scripts/analyze_patterns.py --output data/pattern-stats.json',
+    }, { status: 503 });
+  }
+
+  const tableNames = tableParam ? [tableParam] : Object.keys(artifact.tables);
+  const unknown = tableNames.filter(name => !(name in artifact.tables));
+  if (unknown.length > 0) {
+    return NextResponse.json({
+      error: `Unknown table: ${unknown.join(', ')}`,
+      tables: Object.keys(artifact.tables),
+    }, { status: 400 });
+  }
+
+  return NextResponse.json({
+    success: true,
+    version: artifact.version,
+    generatedAt: artifact.generated_at,
+    meta: artifact.meta,
+    ...Object.fromEntries(tableNames.map(name => [name, tableRecords(artifact.tables[name], analyzer)])),
+  });
+}
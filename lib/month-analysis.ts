@@ -493,3 +493,68 @@ export function getConfidenceLabel(confidence: number): { label: string; color:
   if (confidence >= 30) return { label: 'Low', color: 'orange' };
   return { label: 'Very Low', color: 'red' };
 }
+
+// Precomputed seasonality written by scripts/analyze_patterns.py --seasonality-json
+// (per-name arrays are indexed by calendar month - 1)
+export interface SeasonalityStats {
+  count: number[];
+  mean: (number | null)[];
+  win_rate: (number | null)[];
+  best: number | null;
+  worst: number | null;
+}
+
+export interface SeasonalityArtifact {
+  version: number;
+  generated_at: string;
+  meta: Record<string, unknown>;
+  // Every symbol analyzed, including those left out of `symbols` for too little history
+  universe?: string[];
+  symbols: Record<string, SeasonalityStats & {
+    last_close: number;
+    // [year, month, open, close, high, low, return %, volume]
+    monthly: [number, number, number, number, number, number, number, number][];
+  }>;
+  sectors: Record<string, SeasonalityStats & { members: string[] }>;
+}
+
+// Stock patterns and last closes from the artifact, plus the stocks it analyzed,
+// keyed like SECTORS (no .NS suffix)
+export function patternsFromSeasonality(artifact: SeasonalityArtifact): {
+  stockPatterns: Map<string, StockMonthlyPattern>;
+  currentPrices: Map<string, number>;
+  covered: Set<string>;
+} {
+  const stockPatterns = new Map<string, StockMonthlyPattern>();
+  const currentPrices = new Map<string, number>();
+  const stripSuffix = (ticker: string) => ticker.replace(/\.NS$/, '');
+  const covered = new Set((artifact.universe ?? Object.keys(artifact.symbols)).map(stripSuffix));
+
+  Object.entries(artifact.symbols).forEach(([ticker, stats]) => {
+    const symbol = stripSuffix(ticker);
+    const averageReturnByMonth: Record<number, number> = {};
+    const winRateByMonth: Record<number, number> = {};
+    const dataPointsByMonth: Record<number, number> = {};
+
+    for (let m = 1; m <= 12; m++) {
+      averageReturnByMonth[m] = stats.mean[m - 1] ?? 0;
+      winRateByMonth[m] = stats.win_rate[m - 1] ?? 0;
+      dataPointsByMonth[m] = stats.count[m - 1];
+    }
+
+    stockPatterns.set(symbol, {
+      symbol,
+      monthlyReturns: stats.monthly.map(([year, month, openPrice, closePrice, highPrice, lowPrice, returnPercent, totalVolume]) => ({
+        month, year, openPrice, closePrice, highPrice, lowPrice, returnPercent, totalVolume
+      })),
+      averageReturnByMonth,
+      winRateByMonth,
+      dataPointsByMonth,
+      bestMonth: stats.best ?? 1,
+      worstMonth: stats.worst ?? 1
+    });
+    currentPrices.set(symbol, stats.last_close);
+  });
+
+  return { stockPatterns, currentPrices, covered };
+}
@@ -2,25 +2,39 @@
 """
 Deep Analysis of Nifty 100 Stocks - Finding Hidden Patterns
 Analyzes 2 years of daily data to find concrete, actionable patterns
+
+Usage: analyze_patterns.py [fetch|analyze|sweep|bench] [options]
+(analyze when no command is given; COMMAND --help lists its options)
+
+Needs pandas and numpy (pip install pandas numpy yfinance); yfinance is only
+imported when bars are actually downloaded, so --offline and --data-dir runs
+work without it.
 """
 
-import json
-import time
-from datetime import datetime, timedelta
-from collections import defaultdict
-import statistics
-
-try:
-    import yfinance as yf
-    import pandas as pd
-    import numpy as np
-except ImportError:
-    print("Installing required packages...")
-    import subprocess
-    subprocess.check_call(['pip', 'install', 'yfinance', 'pandas', 'numpy'])
-    import yfinance as yf
-    import pandas as pd
-    import numpy as np
+import argparse
+import importlib.util
+import os
+import sys
+
+from patterns.cache import DEFAULT_TTL, OHLCVCache
+from patterns.download import RateLimitedSource, TokenBucket, bulk_fetch
+from patterns.dsl import compile_patterns, parse_pattern_lines
+from patterns.events import Event, FeatureSet, as_features, event_study, gap_filled
+from patterns.incremental import LOOKBACK, run_incremental
+from patterns.intraday import DEFAULT_CHUNK_ROWS, minute_study, run_intraday
+from patterns.leadlag import lead_lag_matrix
+from patterns.leadlag import write_json as write_leadlag_json
+from patterns.panel import Panel
+from patterns.profiling import Profiler, profile_call
+from patterns.records import LeadLagRecord, by_pattern, to_records, write_records
+from patterns.runner import DEFAULT_SHARD_SIZE, Analyzer, report_results, results_records, run_analyzers
+from patterns.seasonality import ARTIFACT_PERIOD, MONTH_NAMES, best_worst, seasonality
+from patterns.seasonality import write_json as write_seasonality_json
+from patterns.significance import CORRECTIONS, collect_samples, run_significance
+from patterns.sources import LocalFetcher, YFinanceFetcher, period_start
+from patterns.streaks import STREAK_MAGNITUDE_BUCKETS, streak_features
+from patterns.sweep import Sweep, run_sweeps, threshold_grid
+from patterns.walkforward import run_walk_forward, summarize, walk_forward_windows
 
 # Nifty 100 stocks (NSE symbols)
 NIFTY_100 = [
@@ -62,94 +76,79 @@ SECTOR_MAP = {
     "CEMENT": ["ULTRACEMCO.NS", "GRASIM.NS", "AMBUJACEM.NS", "SHREECEM.NS"],
 }
 
-def fetch_stock_data(symbol, period="2y"):
+def add_derived_columns(df, symbol):
+    """Add the return/gap/volume columns every analyzer works from"""
+    df['Symbol'] = symbol
+    df['Returns'] = df['Close'].pct_change() * 100
+    df['Gap'] = ((df['Open'] - df['Close'].shift(1)) / df['Close'].shift(1)) * 100
+    df['Intraday'] = ((df['Close'] - df['Open']) / df['Open']) * 100
+    df['Volume_Ratio'] = df['Volume'] / df['Volume'].rolling(20).mean()
+    return df
+
+def load_stock_data(symbol, period="2y", source=None, profiler=None):
+    """Historical data for a stock from `source` (an OHLCVCache or fetcher, default yfinance); raises on errors"""
+    profiler = profiler or Profiler(enabled=False)
+    with profiler.stage('fetch', symbol) as stage:
+        df = (source or YFinanceFetcher()).history(symbol, period=period)
+        stage.rows = len(df)
+    if len(df) > 0:
+        with profiler.stage('derive', symbol, len(df)):
+            return add_derived_columns(df.copy(), symbol)
+    return None
+
+def fetch_stock_data(symbol, period="2y", source=None):
     """Fetch historical data for a stock"""
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=period)
-        if len(df) > 0:
-            df['Symbol'] = symbol
-            df['Returns'] = df['Close'].pct_change() * 100
-            df['Gap'] = ((df['Open'] - df['Close'].shift(1)) / df['Close'].shift(1)) * 100
-            df['Intraday'] = ((df['Close'] - df['Open']) / df['Open']) * 100
-            df['Volume_Ratio'] = df['Volume'] / df['Volume'].rolling(20).mean()
-            return df
+        return load_stock_data(symbol, period, source)
     except Exception as e:
         print(f"Error fetching {symbol}: {e}")
     return None
 
-def analyze_gap_patterns(all_data):
-    """Analyze what happens after gaps of different sizes"""
+def build_source(args):
+    """
+    Data source for the command line options: cached yfinance by default.
+    --data-dir files are read directly, never through the cache, so they
+    cannot stand in for downloaded bars later; --offline alone reads the cache.
+    """
+    if args.data_dir:
+        return LocalFetcher(args.data_dir)
+    if args.offline:
+        fetcher = None  # the cache never calls it offline
+    else:
+        fetcher = RateLimitedSource(YFinanceFetcher(), TokenBucket(args.rate))
+    if args.no_cache:
+        return fetcher
+    return OHLCVCache(args.cache_dir, fetcher, ttl=args.ttl * 3600, offline=args.offline)
+
+# Gap buckets - each bar falls in at most one
+GAP_EVENTS = [
+    Event('gap_up_small', lambda d: (d['Gap'] >= 0.5) & (d['Gap'] < 1)),  # 0.5-1%
+    Event('gap_up_medium', lambda d: (d['Gap'] >= 1) & (d['Gap'] < 2)),  # 1-2%
+    Event('gap_up_large', lambda d: (d['Gap'] >= 2) & (d['Gap'] < 3)),  # 2-3%
+    Event('gap_up_huge', lambda d: d['Gap'] >= 3),  # >3%
+    Event('gap_down_small', lambda d: (d['Gap'] > -1) & (d['Gap'] <= -0.5)),
+    Event('gap_down_medium', lambda d: (d['Gap'] > -2) & (d['Gap'] <= -1)),
+    Event('gap_down_large', lambda d: (d['Gap'] > -3) & (d['Gap'] <= -2)),
+    Event('gap_down_huge', lambda d: d['Gap'] <= -3),
+]
+
+def collect_gap_patterns(data):
+    return event_study(data, GAP_EVENTS, {'next_day': 1, 'next_3_days': 3},
+                       start=1, stop=3, require=('Gap',),
+                       flags={'gap_fill_same_day': gap_filled})
+
+def report_gap_patterns(records):
     print("\n" + "="*60)
     print("GAP ANALYSIS - What happens after gaps?")
     print("="*60)
 
-    results = {
-        'gap_up_small': {'next_day': [], 'next_3_days': [], 'gap_fill_same_day': 0, 'total': 0},  # 0.5-1%
-        'gap_up_medium': {'next_day': [], 'next_3_days': [], 'gap_fill_same_day': 0, 'total': 0},  # 1-2%
-        'gap_up_large': {'next_day': [], 'next_3_days': [], 'gap_fill_same_day': 0, 'total': 0},  # 2-3%
-        'gap_up_huge': {'next_day': [], 'next_3_days': [], 'gap_fill_same_day': 0, 'total': 0},  # >3%
-        'gap_down_small': {'next_day': [], 'next_3_days': [], 'gap_fill_same_day': 0, 'total': 0},
-        'gap_down_medium': {'next_day': [], 'next_3_days': [], 'gap_fill_same_day': 0, 'total': 0},
-        'gap_down_large': {'next_day': [], 'next_3_days': [], 'gap_fill_same_day': 0, 'total': 0},
-        'gap_down_huge': {'next_day': [], 'next_3_days': [], 'gap_fill_same_day': 0, 'total': 0},
-    }
-
-    for symbol, df in all_data.items():
-        if df is None or len(df) < 10:
-            continue
-
-        for i in range(1, len(df) - 3):
-            gap = df['Gap'].iloc[i]
-            if pd.isna(gap):
-                continue
-
-            # Determine category
-            if 0.5 <= gap < 1:
-                cat = 'gap_up_small'
-            elif 1 <= gap < 2:
-                cat = 'gap_up_medium'
-            elif 2 <= gap < 3:
-                cat = 'gap_up_large'
-            elif gap >= 3:
-                cat = 'gap_up_huge'
-            elif -1 < gap <= -0.5:
-                cat = 'gap_down_small'
-            elif -2 < gap <= -1:
-                cat = 'gap_down_medium'
-            elif -3 < gap <= -2:
-                cat = 'gap_down_large'
-            elif gap <= -3:
-                cat = 'gap_down_huge'
-            else:
-                continue
-
-            results[cat]['total'] += 1
-
-            # Next day return
-            if i + 1 < len(df):
-                results[cat]['next_day'].append(df['Returns'].iloc[i + 1])
-
-            # Next 3 days cumulative return
-            if i + 3 < len(df):
-                cum_return = ((1 + df['Returns'].iloc[i+1:i+4]/100).prod() - 1) * 100
-                results[cat]['next_3_days'].append(cum_return)
-
-            # Gap fill same day (for gap ups, low goes below prev close; for gap downs, high goes above prev close)
-            prev_close = df['Close'].iloc[i-1]
-            if gap > 0 and df['Low'].iloc[i] <= prev_close:
-                results[cat]['gap_fill_same_day'] += 1
-            elif gap < 0 and df['High'].iloc[i] >= prev_close:
-                results[cat]['gap_fill_same_day'] += 1
-
-    # Print results
-    for cat, data in results.items():
+    for cat, data in by_pattern(records).items():
         if data['total'] < 50:
             continue
-        avg_next_day = statistics.mean(data['next_day']) if data['next_day'] else 0
-        avg_next_3 = statistics.mean(data['next_3_days']) if data['next_3_days'] else 0
+        avg_next_day = data['next_day'].mean if data['next_day'].count else 0
+        avg_next_3 = data['next_3_days'].mean if data['next_3_days'].count else 0
         fill_rate = (data['gap_fill_same_day'] / data['total'] * 100) if data['total'] > 0 else 0
-        pos_next_day = len([x for x in data['next_day'] if x > 0]) / len(data['next_day']) * 100 if data['next_day'] else 0
+        pos_next_day = data['next_day'].hit_rate if data['next_day'].count else 0
 
         print(f"\n{cat.upper().replace('_', ' ')} ({data['total']} occurrences):")
         print(f"  Next Day Avg Return: {avg_next_day:.2f}%")
@@ -157,319 +156,649 @@ def analyze_gap_patterns(all_data):
         print(f"  Next 3 Days Avg Return: {avg_next_3:.2f}%")
         print(f"  Gap Fill Same Day: {fill_rate:.1f}%")
 
-    return results
+def analyze_gap_patterns(panel):
+    """Analyze what happens after gaps of different sizes"""
+    records = to_records('gap', collect_gap_patterns(panel))
+    report_gap_patterns(records)
+    return records
+
+def streak_events(max_streak, buckets=None):
+    """up_N / down_N events for N = 2..max_streak, optionally split by the size of the N-day move"""
+    events = []
+    for streak in range(2, max_streak + 1):
+        if buckets is None:
+            events.append(Event(f'up_{streak}', lambda d, n=streak: d['Streak'] >= n))
+            events.append(Event(f'down_{streak}', lambda d, n=streak: d['Streak'] <= -n))
+            continue
+        move = f'Streak_Move_{streak}'
+        for label, low, high in buckets:
+            events.append(Event(f'up_{streak}_{label}', lambda d, n=streak, m=move, lo=low, hi=high:
+                                (d['Streak'] >= n) & (d[m] >= lo) & (d[m] < hi)))
+        for label, low, high in buckets:
+            events.append(Event(f'down_{streak}_{label}', lambda d, n=streak, m=move, lo=low, hi=high:
+                                (d['Streak'] <= -n) & (-d[m] >= lo) & (-d[m] < hi)))
+    return events
+
+def collect_consecutive_days(data, max_streak=5):
+    data = as_features(data)
+    study = dict(start=5, stop=1, dropna=True, features=streak_features(max_streak),
+                 flags={'next_up': lambda d: d['Returns'].shift(-1) > 0,
+                        'next_down': lambda d: d['Returns'].shift(-1) < 0})
+    return {
+        'streaks': event_study(data, streak_events(max_streak), {'next_day': 1}, **study),
+        'by_move': event_study(data, streak_events(max_streak, STREAK_MAGNITUDE_BUCKETS), {'next_day': 1}, **study),
+    }
 
-def analyze_consecutive_days(all_data):
-    """Analyze what happens after consecutive up/down days"""
+def report_consecutive_days(records):
     print("\n" + "="*60)
     print("CONSECUTIVE DAYS ANALYSIS")
     print("="*60)
 
-    results = {}
-    for streak in range(2, 6):
-        results[f'up_{streak}'] = {'next_day': [], 'reversal_rate': 0, 'total': 0}
-        results[f'down_{streak}'] = {'next_day': [], 'reversal_rate': 0, 'total': 0}
-
-    for symbol, df in all_data.items():
-        if df is None or len(df) < 10:
-            continue
-
-        for i in range(5, len(df) - 1):
-            # Check for consecutive up days
-            for streak in range(2, 6):
-                if i - streak >= 0:
-                    returns = df['Returns'].iloc[i-streak+1:i+1].dropna()
-                    if len(returns) == streak:
-                        if all(r > 0 for r in returns):
-                            results[f'up_{streak}']['total'] += 1
-                            next_ret = df['Returns'].iloc[i + 1]
-                            if not pd.isna(next_ret):
-                                results[f'up_{streak}']['next_day'].append(next_ret)
-                                if next_ret < 0:
-                                    results[f'up_{streak}']['reversal_rate'] += 1
-                        elif all(r < 0 for r in returns):
-                            results[f'down_{streak}']['total'] += 1
-                            next_ret = df['Returns'].iloc[i + 1]
-                            if not pd.isna(next_ret):
-                                results[f'down_{streak}']['next_day'].append(next_ret)
-                                if next_ret > 0:
-                                    results[f'down_{streak}']['reversal_rate'] += 1
-
-    for key, data in results.items():
+    for key, data in by_pattern(records, 'streaks').items():
         if data['total'] < 100:
             continue
-        avg_next = statistics.mean(data['next_day']) if data['next_day'] else 0
-        reversal = data['reversal_rate'] / len(data['next_day']) * 100 if data['next_day'] else 0
+        # A reversal is the next day moving against the streak
+        reversals = data['next_down'] if key.startswith('up') else data['next_up']
+        avg_next = data['next_day'].mean if data['next_day'].count else 0
+        reversal = reversals / data['next_day'].count * 100 if data['next_day'].count else 0
 
         print(f"\n{key.upper().replace('_', ' ')} DAYS ({data['total']} occurrences):")
         print(f"  Next Day Avg Return: {avg_next:.2f}%")
         print(f"  Reversal Rate: {reversal:.1f}%")
 
-def analyze_volume_patterns(all_data):
-    """Analyze what happens after volume spikes"""
-    print("\n" + "="*60)
-    print("VOLUME SPIKE ANALYSIS")
-    print("="*60)
-
-    results = {
-        'vol_2x_up': {'next_day': [], 'next_3_days': [], 'total': 0},  # 2x volume on up day
-        'vol_2x_down': {'next_day': [], 'next_3_days': [], 'total': 0},  # 2x volume on down day
-        'vol_3x_up': {'next_day': [], 'next_3_days': [], 'total': 0},
-        'vol_3x_down': {'next_day': [], 'next_3_days': [], 'total': 0},
-    }
-
-    for symbol, df in all_data.items():
-        if df is None or len(df) < 25:
+    print("\nBy size of the move over the streak:")
+    for key, data in by_pattern(records, 'by_move').items():
+        if data['total'] < 100 or not data['next_day'].count:
             continue
+        direction, streak, label = key.split('_', 2)
+        reversals = data['next_down'] if direction == 'up' else data['next_up']
+        avg_next = data['next_day'].mean
+        reversal = reversals / data['next_day'].count * 100
+        print(f"  {direction.upper():>4} {streak:>2} DAYS {label:>6}: {avg_next:6.2f}% next day, "
+              f"{reversal:.1f}% reversal ({data['total']} occurrences)")
+
+def analyze_consecutive_days(panel, max_streak=5):
+    """Analyze what happens after consecutive up/down days"""
+    records = to_records('consecutive_days', collect_consecutive_days(panel, max_streak))
+    report_consecutive_days(records)
+    return records
+
+VOLUME_EVENTS = [
+    Event('vol_2x_up', lambda d: (d['Volume_Ratio'] >= 2) & (d['Volume_Ratio'] < 3) & (d['Returns'] > 0)),  # 2x volume on up day
+    Event('vol_2x_down', lambda d: (d['Volume_Ratio'] >= 2) & (d['Volume_Ratio'] < 3) & (d['Returns'] < 0)),  # 2x volume on down day
+    Event('vol_3x_up', lambda d: (d['Volume_Ratio'] >= 3) & (d['Returns'] > 0)),
+    Event('vol_3x_down', lambda d: (d['Volume_Ratio'] >= 3) & (d['Returns'] < 0)),
+]
 
-        for i in range(21, len(df) - 3):
-            vol_ratio = df['Volume_Ratio'].iloc[i]
-            ret = df['Returns'].iloc[i]
-
-            if pd.isna(vol_ratio) or pd.isna(ret):
-                continue
-
-            if vol_ratio >= 2 and ret > 0:
-                cat = 'vol_2x_up' if vol_ratio < 3 else 'vol_3x_up'
-            elif vol_ratio >= 2 and ret < 0:
-                cat = 'vol_2x_down' if vol_ratio < 3 else 'vol_3x_down'
-            else:
-                continue
-
-            results[cat]['total'] += 1
-
-            if i + 1 < len(df):
-                results[cat]['next_day'].append(df['Returns'].iloc[i + 1])
+def collect_volume_patterns(data):
+    return event_study(data, VOLUME_EVENTS, {'next_day': 1, 'next_3_days': 3},
+                       start=21, stop=3, min_rows=25, require=('Volume_Ratio', 'Returns'))
 
-            if i + 3 < len(df):
-                cum_ret = ((1 + df['Returns'].iloc[i+1:i+4]/100).prod() - 1) * 100
-                results[cat]['next_3_days'].append(cum_ret)
+def report_volume_patterns(records):
+    print("\n" + "="*60)
+    print("VOLUME SPIKE ANALYSIS")
+    print("="*60)
 
-    for key, data in results.items():
+    for key, data in by_pattern(records).items():
         if data['total'] < 50:
             continue
-        avg_next = statistics.mean(data['next_day']) if data['next_day'] else 0
-        avg_3d = statistics.mean(data['next_3_days']) if data['next_3_days'] else 0
-        pos_rate = len([x for x in data['next_day'] if x > 0]) / len(data['next_day']) * 100 if data['next_day'] else 0
+        avg_next = data['next_day'].mean if data['next_day'].count else 0
+        avg_3d = data['next_3_days'].mean if data['next_3_days'].count else 0
+        pos_rate = data['next_day'].hit_rate if data['next_day'].count else 0
 
         print(f"\n{key.upper().replace('_', ' ')} ({data['total']} occurrences):")
         print(f"  Next Day Avg Return: {avg_next:.2f}%")
         print(f"  Next Day Positive Rate: {pos_rate:.1f}%")
         print(f"  Next 3 Days Avg Return: {avg_3d:.2f}%")
 
-def analyze_sector_correlations(all_data):
-    """Analyze sector lead-lag relationships"""
+def analyze_volume_patterns(panel):
+    """Analyze what happens after volume spikes"""
+    records = to_records('volume', collect_volume_patterns(panel))
+    report_volume_patterns(records)
+    return records
+
+def collect_sector_correlations(data, thresholds=(2,), lags=(1, 2, 3, 4, 5)):
+    # Calculate daily sector returns - one matrix reduction over the symbol->sector membership
+    sector_returns = as_features(data).panel.sector_means('Returns', SECTOR_MAP)
+    return lead_lag_matrix(sector_returns, thresholds, sorted(set(lags) | {1}))
+
+def report_sector_correlations(records):
     print("\n" + "="*60)
     print("SECTOR CORRELATION ANALYSIS")
     print("="*60)
 
-    # Calculate daily sector returns
-    sector_returns = {}
-
-    for sector, symbols in SECTOR_MAP.items():
-        sector_df = None
-        for symbol in symbols:
-            if symbol in all_data and all_data[symbol] is not None:
-                if sector_df is None:
-                    sector_df = all_data[symbol][['Returns']].copy()
-                    sector_df.columns = [symbol]
-                else:
-                    temp = all_data[symbol][['Returns']].copy()
-                    temp.columns = [symbol]
-                    sector_df = sector_df.join(temp, how='outer')
+    # Analyze when one sector moves big, what happens to others
+    cells = {}
+    for record in records:
+        if isinstance(record, LeadLagRecord) and record.direction == 'up' and record.lag == 1:
+            cells.setdefault(record.threshold, {}).setdefault(record.leader, []).append(record)
+    for threshold, leaders in cells.items():
+        print(f"\nWhen a sector moves >{threshold:g}%, what happens to others NEXT DAY:")
+
+        for sector1, followers in leaders.items():
+            if followers[0].leader_events < 20:
+                continue
 
-        if sector_df is not None and len(sector_df.columns) >= 2:
-            sector_returns[sector] = sector_df.mean(axis=1).dropna()
+            print(f"\n{sector1} BIG UP (>{threshold:g}%):")
+            for record in followers:
+                if record.follower == sector1 or record.count < 10:
+                    continue
+                print(f"  {record.follower}: {record.mean:.2f}% avg, {record.hit_rate:.0f}% positive "
+                      f"({record.count} samples)")
 
-    # Analyze when one sector moves big, what happens to others
-    print("\nWhen a sector moves >2%, what happens to others NEXT DAY:")
+def analyze_sector_correlations(panel, thresholds=(2,), lags=(1, 2, 3, 4, 5), json_path=None):
+    """Analyze sector lead-lag relationships"""
+    result = collect_sector_correlations(panel, thresholds, lags)
+    records = to_records('sector_correlations', result)
+    report_sector_correlations(records)
+    if json_path:
+        write_leadlag_json(result, json_path)
+        print(f"\nLead-lag matrix written to {json_path}")
+    return records
+
+def price_level_features(cols):
+    """Prior 52-week and 20-day extremes (excluding today)"""
+    return {
+        '52w_high': cols['High'].rolling(252).max().shift(1),
+        '52w_low': cols['Low'].rolling(252).min().shift(1),
+        '20d_high': cols['High'].rolling(20).max().shift(1),
+        '20d_low': cols['Low'].rolling(20).min().shift(1),
+    }
 
-    for sector1, returns1 in sector_returns.items():
-        big_up_days = returns1[returns1 > 2].index
-        big_down_days = returns1[returns1 < -2].index
+PRICE_LEVEL_EVENTS = [
+    # 52-week breakouts only count the first close beyond the level
+    Event('52w_high_breakout',
+          lambda d: (d['Close'] > d['52w_high']) & (d['Close'].shift(1) <= d['52w_high'].shift(1))),
+    Event('52w_low_breakdown',
+          lambda d: (d['Close'] < d['52w_low']) & (d['Close'].shift(1) >= d['52w_low'].shift(1))),
+    Event('20d_high_breakout', lambda d: d['Close'] > d['20d_high'], horizons=('next_5_days',)),
+    Event('20d_low_breakdown', lambda d: d['Close'] < d['20d_low'], horizons=('next_5_days',)),
+]
 
-        if len(big_up_days) < 20:
-            continue
+def collect_price_levels(data):
+    return event_study(data, PRICE_LEVEL_EVENTS, {'next_5_days': 5, 'next_20_days': 20},
+                       start=260, stop=20, min_rows=260, method='close',
+                       features=price_level_features)
 
-        print(f"\n{sector1} BIG UP (>2%):")
-        for sector2, returns2 in sector_returns.items():
-            if sector1 == sector2:
-                continue
-            next_day_returns = []
-            for day in big_up_days:
-                try:
-                    idx = returns2.index.get_loc(day)
-                    if idx + 1 < len(returns2):
-                        next_day_returns.append(returns2.iloc[idx + 1])
-                except:
-                    pass
-            if len(next_day_returns) >= 10:
-                avg = statistics.mean(next_day_returns)
-                pos_rate = len([x for x in next_day_returns if x > 0]) / len(next_day_returns) * 100
-                print(f"  {sector2}: {avg:.2f}% avg, {pos_rate:.0f}% positive ({len(next_day_returns)} samples)")
-
-def analyze_price_levels(all_data):
-    """Analyze what happens at key price levels"""
+def report_price_levels(records):
     print("\n" + "="*60)
     print("PRICE LEVEL BREAKOUT ANALYSIS")
     print("="*60)
 
-    results = {
-        '52w_high_breakout': {'next_5_days': [], 'next_20_days': [], 'total': 0},
-        '52w_low_breakdown': {'next_5_days': [], 'next_20_days': [], 'total': 0},
-        '20d_high_breakout': {'next_5_days': [], 'total': 0},
-        '20d_low_breakdown': {'next_5_days': [], 'total': 0},
-    }
-
-    for symbol, df in all_data.items():
-        if df is None or len(df) < 260:
-            continue
-
-        df['52w_high'] = df['High'].rolling(252).max().shift(1)
-        df['52w_low'] = df['Low'].rolling(252).min().shift(1)
-        df['20d_high'] = df['High'].rolling(20).max().shift(1)
-        df['20d_low'] = df['Low'].rolling(20).min().shift(1)
-
-        for i in range(260, len(df) - 20):
-            # 52-week high breakout
-            if df['Close'].iloc[i] > df['52w_high'].iloc[i] and df['Close'].iloc[i-1] <= df['52w_high'].iloc[i-1]:
-                results['52w_high_breakout']['total'] += 1
-                if i + 5 < len(df):
-                    cum_5d = ((df['Close'].iloc[i+5] / df['Close'].iloc[i]) - 1) * 100
-                    results['52w_high_breakout']['next_5_days'].append(cum_5d)
-                if i + 20 < len(df):
-                    cum_20d = ((df['Close'].iloc[i+20] / df['Close'].iloc[i]) - 1) * 100
-                    results['52w_high_breakout']['next_20_days'].append(cum_20d)
-
-            # 52-week low breakdown
-            if df['Close'].iloc[i] < df['52w_low'].iloc[i] and df['Close'].iloc[i-1] >= df['52w_low'].iloc[i-1]:
-                results['52w_low_breakdown']['total'] += 1
-                if i + 5 < len(df):
-                    cum_5d = ((df['Close'].iloc[i+5] / df['Close'].iloc[i]) - 1) * 100
-                    results['52w_low_breakdown']['next_5_days'].append(cum_5d)
-                if i + 20 < len(df):
-                    cum_20d = ((df['Close'].iloc[i+20] / df['Close'].iloc[i]) - 1) * 100
-                    results['52w_low_breakdown']['next_20_days'].append(cum_20d)
-
-            # 20-day high/low
-            if df['Close'].iloc[i] > df['20d_high'].iloc[i]:
-                results['20d_high_breakout']['total'] += 1
-                if i + 5 < len(df):
-                    cum_5d = ((df['Close'].iloc[i+5] / df['Close'].iloc[i]) - 1) * 100
-                    results['20d_high_breakout']['next_5_days'].append(cum_5d)
-
-            if df['Close'].iloc[i] < df['20d_low'].iloc[i]:
-                results['20d_low_breakdown']['total'] += 1
-                if i + 5 < len(df):
-                    cum_5d = ((df['Close'].iloc[i+5] / df['Close'].iloc[i]) - 1) * 100
-                    results['20d_low_breakdown']['next_5_days'].append(cum_5d)
-
-    for key, data in results.items():
+    for key, data in by_pattern(records).items():
         if data['total'] < 50:
             continue
-        avg_5d = statistics.mean(data['next_5_days']) if data['next_5_days'] else 0
-        pos_5d = len([x for x in data['next_5_days'] if x > 0]) / len(data['next_5_days']) * 100 if data['next_5_days'] else 0
+        avg_5d = data['next_5_days'].mean if data['next_5_days'].count else 0
+        pos_5d = data['next_5_days'].hit_rate if data['next_5_days'].count else 0
 
         print(f"\n{key.upper().replace('_', ' ')} ({data['total']} occurrences):")
         print(f"  Next 5 Days Avg Return: {avg_5d:.2f}%")
         print(f"  Next 5 Days Positive Rate: {pos_5d:.1f}%")
 
-        if 'next_20_days' in data and data['next_20_days']:
-            avg_20d = statistics.mean(data['next_20_days'])
-            pos_20d = len([x for x in data['next_20_days'] if x > 0]) / len(data['next_20_days']) * 100
+        if 'next_20_days' in data and data['next_20_days'].count:
+            avg_20d = data['next_20_days'].mean
+            pos_20d = data['next_20_days'].hit_rate
             print(f"  Next 20 Days Avg Return: {avg_20d:.2f}%")
             print(f"  Next 20 Days Positive Rate: {pos_20d:.1f}%")
 
-def analyze_intraday_reversal(all_data):
-    """Analyze intraday reversal patterns"""
+def analyze_price_levels(panel):
+    """Analyze what happens at key price levels"""
+    records = to_records('price_levels', collect_price_levels(panel))
+    report_price_levels(records)
+    return records
+
+INTRADAY_REVERSAL_EVENTS = [
+    # Gap up but closed red
+    Event('gap_up_close_red', lambda d: (d['Gap'] > 1) & (d['Intraday'] < -0.5)),
+    # Gap down but closed green
+    Event('gap_down_close_green', lambda d: (d['Gap'] < -1) & (d['Intraday'] > 0.5)),
+    # Low was 2%+ below open, closed positive
+    Event('big_intraday_reversal_up',
+          lambda d: (((d['Low'] - d['Open']) / d['Open']) * 100 < -2) & (d['Close'] > d['Open'])),
+    # High was 2%+ above open, closed negative
+    Event('big_intraday_reversal_down',
+          lambda d: (((d['High'] - d['Open']) / d['Open']) * 100 > 2) & (d['Close'] < d['Open'])),
+]
+
+def collect_intraday_reversal(data):
+    return event_study(data, INTRADAY_REVERSAL_EVENTS, {'next_day': 1},
+                       start=1, stop=1, require=('Gap', 'Intraday'))
+
+def report_intraday_reversal(records):
     print("\n" + "="*60)
     print("INTRADAY REVERSAL ANALYSIS")
     print("="*60)
 
-    results = {
-        'gap_up_close_red': {'next_day': [], 'total': 0},  # Gap up but closed red
-        'gap_down_close_green': {'next_day': [], 'total': 0},  # Gap down but closed green
-        'big_intraday_reversal_up': {'next_day': [], 'total': 0},  # Low was 2%+ below open, closed positive
-        'big_intraday_reversal_down': {'next_day': [], 'total': 0},  # High was 2%+ above open, closed negative
-    }
+    for key, data in by_pattern(records).items():
+        if data['total'] < 30:
+            continue
+        avg = data['next_day'].mean if data['next_day'].count else 0
+        pos_rate = data['next_day'].hit_rate if data['next_day'].count else 0
 
-    for symbol, df in all_data.items():
-        if df is None or len(df) < 10:
+        print(f"\n{key.upper().replace('_', ' ')} ({data['total']} occurrences):")
+        print(f"  Next Day Avg Return: {avg:.2f}%")
+        print(f"  Next Day Positive Rate: {pos_rate:.1f}%")
+
+def analyze_intraday_reversal(panel):
+    """Analyze intraday reversal patterns"""
+    records = to_records('intraday_reversal', collect_intraday_reversal(panel))
+    report_intraday_reversal(records)
+    return records
+
+def collect_minute_patterns(daily):
+    """
+    Gap and reversal events over one symbol's minute-bar daily summary, with
+    intraday timing; each group keeps its daily analyzer's eligible days
+    """
+    flags = {'gap_fill_same_day': gap_filled}
+    return {**minute_study(daily, GAP_EVENTS, start=1, stop=3, require=('Gap',), flags=flags),
+            **minute_study(daily, INTRADAY_REVERSAL_EVENTS, start=1, stop=1, require=('Gap', 'Intraday'),
+                           flags=flags)}
+
+def format_clock(minutes):
+    return f"{int(minutes) // 60:02d}:{int(minutes) % 60:02d}"
+
+def report_minute_patterns(records):
+    print("\n" + "="*60)
+    print("INTRADAY TIMING - When do gaps fill and reversals turn?")
+    print("="*60)
+
+    for key, data in by_pattern(records).items():
+        if data['total'] < 30:
+            continue
+        print(f"\n{key.upper().replace('_', ' ')} ({data['total']} occurrences):")
+        if key.startswith('gap_') and 'close' not in key:
+            fill = data['Fill_Minutes']
+            print(f"  Gap Fill Same Day: {data['gap_fill_same_day'] / data['total'] * 100:.1f}%")
+            if fill.count:
+                print(f"  Avg Time To Fill: {fill.mean:.0f} min after the open (std {fill.std:.0f})")
             continue
+        # A reversal turns at the day's extreme against the close
+        turn = data['High_Time'] if key.endswith(('down', 'red')) else data['Low_Time']
+        if turn.count:
+            print(f"  Avg Turn Time: {format_clock(turn.mean)} (std {turn.std:.0f} min)")
 
-        for i in range(1, len(df) - 1):
-            gap = df['Gap'].iloc[i]
-            intraday = df['Intraday'].iloc[i]
-            open_price = df['Open'].iloc[i]
-            high = df['High'].iloc[i]
-            low = df['Low'].iloc[i]
-            close = df['Close'].iloc[i]
+CUSTOM_HORIZONS = {'next_day': 1, 'next_3_days': 3, 'next_5_days': 5}
 
-            if pd.isna(gap) or pd.isna(intraday):
-                continue
+def collect_custom_patterns(data, patterns):
+    """User patterns ({name: expression}, see patterns/dsl.py), all masks built in one pass"""
+    compiled = compile_patterns(patterns)
+    return event_study(data, compiled.events(), CUSTOM_HORIZONS, start=1, stop=5,
+                       features=compiled.features)
 
-            # Gap up but closed red
-            if gap > 1 and intraday < -0.5:
-                results['gap_up_close_red']['total'] += 1
-                results['gap_up_close_red']['next_day'].append(df['Returns'].iloc[i + 1])
-
-            # Gap down but closed green
-            if gap < -1 and intraday > 0.5:
-                results['gap_down_close_green']['total'] += 1
-                results['gap_down_close_green']['next_day'].append(df['Returns'].iloc[i + 1])
-
-            # Big intraday reversal up
-            low_from_open = ((low - open_price) / open_price) * 100
-            if low_from_open < -2 and close > open_price:
-                results['big_intraday_reversal_up']['total'] += 1
-                results['big_intraday_reversal_up']['next_day'].append(df['Returns'].iloc[i + 1])
-
-            # Big intraday reversal down
-            high_from_open = ((high - open_price) / open_price) * 100
-            if high_from_open > 2 and close < open_price:
-                results['big_intraday_reversal_down']['total'] += 1
-                results['big_intraday_reversal_down']['next_day'].append(df['Returns'].iloc[i + 1])
-
-    for key, data in results.items():
+def report_custom_patterns(records):
+    print("\n" + "="*60)
+    print("CUSTOM PATTERNS")
+    print("="*60)
+
+    for key, data in by_pattern(records).items():
         if data['total'] < 30:
+            print(f"\n{key} ({data['total']} occurrences): too few to report")
             continue
-        avg = statistics.mean(data['next_day']) if data['next_day'] else 0
-        pos_rate = len([x for x in data['next_day'] if x > 0]) / len(data['next_day']) * 100 if data['next_day'] else 0
+        print(f"\n{key} ({data['total']} occurrences):")
+        for outcome, label in (('next_day', 'Next Day'), ('next_3_days', 'Next 3 Days'),
+                               ('next_5_days', 'Next 5 Days')):
+            if data[outcome].count:
+                print(f"  {label} Avg Return: {data[outcome].mean:.2f}% "
+                      f"(positive {data[outcome].hit_rate:.1f}%)")
+
+def build_analyzers(max_streak=5, leadlag_thresholds=(2,), leadlag_lags=(1, 2, 3, 4, 5), patterns=None):
+    """Every analyzer main() runs, in report order; `patterns` adds the custom pattern analyzer"""
+    custom = [Analyzer('custom', collect_custom_patterns, report_custom_patterns,
+                       {'patterns': patterns})] if patterns else []
+    return [
+        Analyzer('gap', collect_gap_patterns, report_gap_patterns),
+        Analyzer('consecutive_days', collect_consecutive_days, report_consecutive_days,
+                 {'max_streak': max_streak}),
+        Analyzer('volume', collect_volume_patterns, report_volume_patterns),
+        Analyzer('sector_correlations', collect_sector_correlations, report_sector_correlations,
+                 {'thresholds': tuple(leadlag_thresholds), 'lags': tuple(leadlag_lags)}, cross_sectional=True),
+        Analyzer('price_levels', collect_price_levels, report_price_levels),
+        Analyzer('intraday_reversal', collect_intraday_reversal, report_intraday_reversal),
+    ] + custom
+
+# Threshold sweeps around the analyzers' hard-coded cutoffs (see run_sweeps)
+SWEEPS = [
+    Sweep('gap_up', lambda d: d['Gap'], threshold_grid(0.25, 5, 0.25)),
+    Sweep('gap_down', lambda d: d['Gap'], threshold_grid(0.25, 5, 0.25), side='below'),
+    Sweep('vol_up', lambda d: d['Volume_Ratio'], threshold_grid(1.5, 5, 0.25),
+          condition=lambda d: d['Returns'] > 0, start=21, min_rows=25),
+    Sweep('vol_down', lambda d: d['Volume_Ratio'], threshold_grid(1.5, 5, 0.25),
+          condition=lambda d: d['Returns'] < 0, start=21, min_rows=25),
+    Sweep('gap_up_close_red', lambda d: d['Gap'], threshold_grid(0.5, 4, 0.25),
+          condition=lambda d: d['Intraday'] < -0.5),
+    Sweep('gap_down_close_green', lambda d: d['Gap'], threshold_grid(0.5, 4, 0.25), side='below',
+          condition=lambda d: d['Intraday'] > 0.5),
+    # Intraday reversal: how far below/above the open the day traded before closing the other way
+    Sweep('intraday_reversal_up', lambda d: ((d['Low'] - d['Open']) / d['Open']) * 100,
+          threshold_grid(0.5, 5, 0.25), side='below', condition=lambda d: d['Close'] > d['Open']),
+    Sweep('intraday_reversal_down', lambda d: ((d['High'] - d['Open']) / d['Open']) * 100,
+          threshold_grid(0.5, 5, 0.25), condition=lambda d: d['Close'] < d['Open']),
+]
 
-        print(f"\n{key.upper().replace('_', ' ')} ({data['total']} occurrences):")
-        print(f"  Next Day Avg Return: {avg:.2f}%")
-        print(f"  Next Day Positive Rate: {pos_rate:.1f}%")
+def report_sweeps(table):
+    print("\n" + "="*60)
+    print("PARAMETER SWEEP")
+    print("="*60)
 
-def main():
+    for name, rows in table.groupby('sweep', sort=False):
+        print(f"\n{name.upper().replace('_', ' ')}:")
+        print(rows.drop(columns='sweep').to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+def report_significance(table, correction, alpha):
+    print("\n" + "="*60)
+    print("PATTERN SIGNIFICANCE")
     print("="*60)
-    print("NIFTY 100 DEEP PATTERN ANALYSIS")
-    print("Analyzing 2 years of daily data")
+    print(f"Bootstrap CI of the mean; p-value vs random same-symbol days, {correction.upper()}-adjusted")
+
+    for name, rows in table.groupby('analyzer', sort=False):
+        print(f"\n{name.upper().replace('_', ' ')}:")
+        print(rows.drop(columns='analyzer').to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print(f"\n{int(table['significant'].sum())} of {len(table)} pattern outcomes significant at {alpha}")
+
+def report_walk_forward(summary, windows, dates):
+    print("\n" + "="*60)
+    print("WALK-FORWARD (OUT-OF-SAMPLE) ANALYSIS")
     print("="*60)
+    print(f"{len(windows)} windows, first test period from {dates[windows[0].test_start].date()}"
+          if windows else "History too short for a single train/test window")
 
-    # Fetch data for all stocks
-    all_data = {}
-    total = len(NIFTY_100)
-
-    print(f"\nFetching data for {total} stocks...")
-    for i, symbol in enumerate(NIFTY_100):
-        print(f"  [{i+1}/{total}] {symbol}...", end=" ")
-        df = fetch_stock_data(symbol)
-        if df is not None:
-            all_data[symbol] = df
-            print(f"OK ({len(df)} days)")
-        else:
-            print("FAILED")
-        time.sleep(0.1)  # Rate limiting
+    for name, rows in summary.groupby('analyzer', sort=False):
+        print(f"\n{name.upper().replace('_', ' ')}:")
+        print(rows.drop(columns='analyzer').to_string(index=False, float_format=lambda x: f"{x:.2f}"))
 
-    print(f"\nSuccessfully fetched data for {len(all_data)} stocks")
+def report_seasonality(result, min_years=5, top=3):
+    print("\n" + "="*60)
+    print("MONTHLY SEASONALITY - Average open-to-close return by calendar month")
+    print("="*60)
 
-    # Run analyses
-    gap_results = analyze_gap_patterns(all_data)
-    analyze_consecutive_days(all_data)
-    analyze_volume_patterns(all_data)
-    analyze_sector_correlations(all_data)
-    analyze_price_levels(all_data)
-    analyze_intraday_reversal(all_data)
+    stats = result.sectors
+    print("\nSectors (equal-weight), avg % / win rate %:")
+    print(f"{'':12}" + "".join(f"{name:>12}" for name in MONTH_NAMES))
+    for sector in stats.mean.columns:
+        cells = "".join(f"{mean:>6.1f}/{win:<5.0f}" if count else f"{'-':>12}"
+                        for mean, win, count in zip(stats.mean[sector], stats.win_rate[sector], stats.count[sector]))
+        best, worst = best_worst(stats, sector)
+        print(f"{sector:12}{cells}  best {MONTH_NAMES[best - 1] if best else '-'}, "
+              f"worst {MONTH_NAMES[worst - 1] if worst else '-'}")
+
+    # Strongest stocks per calendar month, with enough years behind them
+    stats = result.symbols
+    print(f"\nTop {top} stocks per month (at least {min_years} years of data):")
+    for month, name in enumerate(MONTH_NAMES, 1):
+        mean = stats.mean.loc[month].where(stats.count.loc[month] >= min_years).dropna()
+        leaders = mean.sort_values(ascending=False).head(top)
+        cells = ", ".join(f"{symbol.replace('.NS', '')} {value:+.1f}% ({stats.win_rate.loc[month, symbol]:.0f}% of "
+                          f"{stats.count.loc[month, symbol]}y)" for symbol, value in leaders.items())
+        print(f"  {name}: {cells or '-'}")
+
+def report_profile(profiler, top=10):
+    print("\n" + "="*60)
+    print("PROFILE")
+    print("="*60)
+    print("Wall/CPU seconds summed per stage (downloads overlap across threads); peak RSS in MB\n")
+    fmt = lambda x: f"{x:.3f}"
+    print(profiler.summary().to_string(float_format=fmt))
+    print(f"\nTop {top} offenders:")
+    print(profiler.offenders(top).to_string(index=False, float_format=fmt))
+
+def profile_hottest_analyzer(profiler, panel, analyzers, dump_path=None):
+    """Re-run the analyzer with the most wall time under cProfile and print its hot spots"""
+    name = profiler.hottest('analyze:')
+    analyzer = next((a for a in analyzers if a.name == name), None)
+    if analyzer is None:
+        return
+    data = panel if analyzer.cross_sectional else FeatureSet(panel)
+    _, text = profile_call(lambda: analyzer.collect(data, **(analyzer.kwargs or {})), dump_path)
+    print(f"\ncProfile of the hottest analyzer ({name}):")
+    print(text)
+    if dump_path:
+        print(f"Profile written to {dump_path}")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'ohlcv')
+DEFAULT_STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'state')
+
+COMMANDS = ('fetch', 'analyze', 'sweep', 'bench')
+
+def add_data_options(parser):
+    """Where the daily bars come from - shared by every command that reads them"""
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="OHLCV cache directory")
+    parser.add_argument('--ttl', type=float, default=DEFAULT_TTL / 3600,
+                        help="hours before cached bars are refreshed (default: %(default)s)")
+    parser.add_argument('--offline', action='store_true',
+                        help="local data only: the cache, or --data-dir files; never download (or import yfinance)")
+    parser.add_argument('--no-cache', action='store_true', help="always download, bypassing the cache")
+    parser.add_argument('--data-dir',
+                        help="read <symbol>.csv files from this directory instead of yfinance (never cached)")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent downloads (default: %(default)s)")
+    parser.add_argument('--rate', type=float, default=4.0,
+                        help="max yfinance requests per second (default: %(default)s)")
+    parser.add_argument('--retries', type=int, default=3, help="retries per symbol (default: %(default)s)")
+    parser.add_argument('--period',
+                        help="history to load, yfinance style (default: 2y, 15y with --seasonality "
+                             "unless writing --seasonality-json)")
+    parser.add_argument('--profile', action='store_true',
+                        help="time every stage and symbol and print the top offenders at the end")
+
+def parse_args(argv=None):
+    """
+    Parse `COMMAND [options]`; without a command the arguments are taken as
+    `analyze` options, as before the subcommands existed.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = ['analyze'] + argv
+
+    parser = argparse.ArgumentParser(description="Deep pattern analysis of Nifty 100 stocks")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+
+    fetch = commands.add_parser('fetch', help="download or refresh the cached daily bars, without analyzing")
+    analyze = commands.add_parser('analyze', help="run the analyzers and print the report (the default)")
+    sweep = commands.add_parser('sweep', help="sweep the gap/volume/reversal thresholds")
+    # Handled by main() before parsing; listed here for --help
+    commands.add_parser('bench', help="benchmark the analyzers on synthetic data (see bench --help)", add_help=False)
+    for command in (fetch, analyze, sweep):
+        add_data_options(command)
+
+    sweep.add_argument('--sweep-horizons', type=int, nargs='+', default=[1, 2, 3, 5, 10],
+                       help="forward horizons in bars (default: 1 2 3 5 10)")
+    sweep.add_argument('--min-count', type=int, default=30,
+                       help="drop grid points with fewer events (default: %(default)s)")
+    sweep.add_argument('--sweep-csv', help="write the sweep table to this CSV file")
+
+    analyze.add_argument('--leadlag-json', help="write the sector lead-lag matrix to this JSON file")
+    analyze.add_argument('--leadlag-thresholds', type=float, nargs='+', default=[2.0],
+                         help="sector move thresholds in %% for the lead-lag matrix (default: 2)")
+    analyze.add_argument('--leadlag-lags', type=int, nargs='+', default=[1, 2, 3, 4, 5],
+                         help="days after a sector move to measure followers at (default: 1 2 3 4 5; "
+                              "the next day is always included)")
+    analyze.add_argument('--jobs', type=int, default=None,
+                         help="analyzer processes (default: all CPU cores, 1 = serial)")
+    analyze.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                         help="symbols per analyzer shard (default: %(default)s)")
+    analyze.add_argument('--max-streak', type=int, default=5,
+                         help="longest up/down streak to analyze (default: %(default)s)")
+    analyze.add_argument('--incremental', action='store_true',
+                         help="only study bars newer than the saved state and merge them into it")
+    analyze.add_argument('--state-dir', default=DEFAULT_STATE_DIR,
+                         help="where --incremental keeps per-analyzer statistics")
+    analyze.add_argument('--min-count', type=int, default=30,
+                         help="skip patterns with fewer events in the significance and walk-forward tables "
+                              "(default: %(default)s)")
+    analyze.add_argument('--significance', action='store_true',
+                         help="bootstrap CIs and permutation p-values for every pattern instead of the standard report")
+    analyze.add_argument('--resamples', type=int, default=2000,
+                         help="bootstrap/permutation resamples per pattern (default: %(default)s)")
+    analyze.add_argument('--correction', choices=CORRECTIONS, default='bh',
+                         help="multiple-comparison correction (default: %(default)s)")
+    analyze.add_argument('--alpha', type=float, default=0.05,
+                         help="significance level for adjusted p-values (default: %(default)s)")
+    analyze.add_argument('--seed', type=int, default=0, help="resampling seed (default: %(default)s)")
+    analyze.add_argument('--significance-csv', help="write the significance table to this CSV file")
+    analyze.add_argument('--output',
+                         help="write the result records to this .json (or .parquet, needs pyarrow) artifact")
+    analyze.add_argument('--no-report', action='store_true', help="skip printing the report")
+    analyze.add_argument('--walk-forward', action='store_true',
+                         help="train/test pattern stability over rolling windows instead of the standard report")
+    analyze.add_argument('--train-bars', type=int, default=250,
+                         help="trading days per walk-forward train window (default: %(default)s)")
+    analyze.add_argument('--test-bars', type=int, default=60,
+                         help="trading days per walk-forward test window, and the step (default: %(default)s)")
+    analyze.add_argument('--embargo', type=int, default=20,
+                         help="days between train and test so train outcomes end before testing (default: %(default)s)")
+    analyze.add_argument('--walk-forward-csv', help="write the per-window walk-forward table to this CSV file")
+    analyze.add_argument('--profile-dump',
+                         help="with --profile, write a cProfile dump of the hottest analyzer to this file")
+    analyze.add_argument('--seasonality', action='store_true',
+                         help="average return and win rate by calendar month per stock and sector "
+                              "instead of the standard report")
+    analyze.add_argument('--seasonality-json',
+                         help="write the seasonality artifact served by /api/month-analysis to this file "
+                              "(e.g. data/month-seasonality.json); the API serves it only when built "
+                              f"from --period {ARTIFACT_PERIOD}, the history it analyzes live")
+    analyze.add_argument('--pattern', action='append', default=[], metavar="'NAME: EXPR'",
+                         help="custom pattern to analyze, e.g. 'fade: gap > 1 and intraday < -0.5' (repeatable)")
+    analyze.add_argument('--patterns-file',
+                         help="file of 'name: expression' lines to analyze as custom patterns")
+    analyze.add_argument('--minute-dir',
+                         help="stream <symbol>.csv minute bars from this directory for intraday gap-fill and "
+                              "reversal timing instead of the daily analysis")
+    analyze.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                         help="minute bars read per chunk in --minute-dir mode (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.period is None:
+        if getattr(args, 'seasonality_json', None):
+            args.period = ARTIFACT_PERIOD
+        else:
+            args.period = '15y' if getattr(args, 'seasonality', False) else '2y'
+    try:
+        period_start(args.period)
+    except ValueError:
+        parser.error(f"--period {args.period!r} is not a yfinance period like 5d, 6mo, 2y or max")
+    if args.offline and args.command == 'fetch':
+        parser.error("fetch downloads bars, so it cannot run --offline")
+    if args.data_dir and args.command == 'fetch':
+        parser.error("fetch fills the download cache, so it cannot read --data-dir")
+    if args.no_cache and args.command == 'fetch':
+        parser.error("fetch fills the download cache, so it cannot run --no-cache")
+    if args.offline and args.no_cache and not args.data_dir:
+        parser.error("--offline --no-cache has nothing local to read without --data-dir")
+    if args.command != 'analyze':
+        return args
+    if min(args.leadlag_lags) < 1:
+        parser.error("--leadlag-lags must be whole days >= 1")
+    if args.shard_size < 1:
+        parser.error("--shard-size must be at least 1 symbol")
+    if args.resamples < 1:
+        parser.error("--resamples must be at least 1")
+    if args.output and args.output.endswith('.parquet') and importlib.util.find_spec('pyarrow') is None:
+        parser.error("--output .parquet needs pyarrow (pip install pyarrow), or write .json")
+    # Compile the custom patterns now so a typo fails before any download
+    try:
+        lines = list(args.pattern)
+        if args.patterns_file:
+            with open(args.patterns_file) as f:
+                lines += f.readlines()
+        args.patterns = parse_pattern_lines(lines)
+        compile_patterns(args.patterns)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    return args
+
+def sweep_mode(args, panel, profiler):
+    with profiler.stage('sweep', rows=int(panel.lengths.sum())):
+        table = run_sweeps(panel, SWEEPS, args.sweep_horizons, min_count=args.min_count)
+    report_sweeps(table)
+    if args.sweep_csv:
+        table.to_csv(args.sweep_csv, index=False)
+        print(f"\nSweep table written to {args.sweep_csv}")
+
+def significance_mode(args, panel, analyzers, profiler):
+    with profiler.stage('collect_samples', rows=int(panel.lengths.sum())):
+        samples = collect_samples(panel, analyzers)
+    with profiler.stage('resample', rows=sum(len(sample.values) for sample in samples.values())):
+        table = run_significance(samples, args.resamples, seed=args.seed,
+                                 workers=args.jobs or os.cpu_count() or 1, correction=args.correction,
+                                 alpha=args.alpha, min_count=args.min_count)
+    report_significance(table, args.correction, args.alpha)
+    if args.significance_csv:
+        table.to_csv(args.significance_csv, index=False)
+        print(f"\nSignificance table written to {args.significance_csv}")
+
+def walk_forward_mode(args, panel, analyzers, profiler):
+    windows = walk_forward_windows(len(panel.dates), args.train_bars, args.test_bars, embargo=args.embargo)
+    with profiler.stage('collect_samples', rows=int(panel.lengths.sum())):
+        samples = collect_samples(panel, analyzers)
+    with profiler.stage('walk_forward', rows=len(windows)):
+        table = run_walk_forward(samples, panel.dates, windows)
+    report_walk_forward(summarize(table, args.min_count), windows, panel.dates)
+    if args.walk_forward_csv:
+        table.to_csv(args.walk_forward_csv, index=False)
+        print(f"\nWalk-forward table written to {args.walk_forward_csv}")
+
+def intraday_mode(args, profiler):
+    print(f"\nStreaming minute bars from {args.minute_dir} ({args.chunk_rows} rows per chunk)...")
+    with profiler.stage('intraday') as stage:
+        results, found = run_intraday(args.minute_dir, NIFTY_100, collect_minute_patterns, add_derived_columns,
+                                      chunk_rows=args.chunk_rows, workers=args.jobs or os.cpu_count() or 1)
+        stage.rows = len(found)
+    print(f"Analyzed minute bars for {len(found)} stocks")
+    records = to_records('intraday_timing', results)
+    if args.output:
+        with profiler.stage('write', rows=len(records)):
+            written = write_records(records, args.output, {'symbols': len(found), 'source': 'minute'})
+        for path in written:
+            print(f"\nResults written to {path}")
+    if not args.no_report:
+        report_minute_patterns(records)
+
+def seasonality_mode(args, panel, profiler):
+    with profiler.stage('seasonality', rows=int(panel.lengths.sum())):
+        result = seasonality(panel, SECTOR_MAP)
+    if args.seasonality_json:
+        meta = {'symbols': len(panel.symbols), 'period': args.period,
+                'first_date': panel.dates[0].date().isoformat() if len(panel.dates) else None,
+                'last_date': panel.dates[-1].date().isoformat() if len(panel.dates) else None}
+        with profiler.stage('write'):
+            write_seasonality_json(result, args.seasonality_json, meta=meta)
+        print(f"\nSeasonality written to {args.seasonality_json}")
+        if args.period != ARTIFACT_PERIOD:
+            print(f"Note: /api/month-analysis only serves {ARTIFACT_PERIOD} artifacts, the history it "
+                  f"analyzes live, so it will ignore this {args.period} one")
+    if not args.no_report:
+        report_seasonality(result)
+
+def report_mode(args, panel, analyzers, profiler):
+    # Run analyses - shared features per shard of symbols, shards spread over processes
+    if args.incremental:
+        # Custom patterns may read further back than the built-in analyzers' windows
+        lookback = max(LOOKBACK, compile_patterns(args.patterns).lookback) if args.patterns else LOOKBACK
+        results, added = run_incremental(panel, analyzers, args.state_dir, lookback)
+        print(f"\nIncremental update ({args.state_dir}):")
+        for name, count in added.items():
+            print(f"  {name}: {count} new events")
+    else:
+        results = run_analyzers(panel, analyzers, workers=args.jobs, shard_size=args.shard_size,
+                                profiler=profiler)
+    records = results_records(analyzers, results)
+
+    if args.output:
+        meta = {'symbols': len(panel.symbols), 'period': args.period,
+                'first_date': panel.dates[0].date().isoformat() if len(panel.dates) else None,
+                'last_date': panel.dates[-1].date().isoformat() if len(panel.dates) else None}
+        with profiler.stage('write', rows=len(records)):
+            written = write_records(records, args.output, meta)
+        for path in written:
+            print(f"\nResults written to {path}")
+
+    if args.leadlag_json:
+        write_leadlag_json(results['sector_correlations'], args.leadlag_json)
+        print(f"\nLead-lag matrix written to {args.leadlag_json}")
+
+    if args.no_report:
+        return
+    with profiler.stage('report', rows=len(records)):
+        report_results(analyzers, records)
 
     # Summary
     print("\n" + "="*60)
@@ -481,5 +810,93 @@ Based on 2 years of Nifty 100 data, the most actionable patterns are:
 (See detailed analysis above for statistics)
 """)
 
+def print_progress(done, total, symbol, df, error):
+    status = f"OK ({len(df)} days)" if df is not None else f"FAILED ({error})"
+    print(f"  [{done}/{total}] {symbol}... {status}")
+
+def load_panel(args, source, profiler):
+    """Bars of every stock with derived columns, as one Panel"""
+    print(f"\nFetching data for {len(NIFTY_100)} stocks...")
+    all_data, report = bulk_fetch(NIFTY_100, lambda symbol: load_stock_data(symbol, args.period, source, profiler),
+                                  workers=args.workers, retries=args.retries, progress=print_progress)
+
+    print(f"\n{report.summary()}")
+    print(f"\nSuccessfully fetched data for {len(all_data)} stocks")
+    if not all_data:
+        if args.data_dir:
+            sys.exit(f"no bars for any stock in {args.data_dir}")
+        if args.offline:
+            sys.exit(f"no cached bars in {args.cache_dir}; run `fetch` first or pass --data-dir")
+        sys.exit("no bars fetched for any stock")
+
+    # One aligned date x symbol matrix per field, shared by every analyzer
+    with profiler.stage('panel', rows=sum(len(df) for df in all_data.values())):
+        return Panel.from_frames(all_data)
+
+def print_header():
+    print("="*60)
+    print("NIFTY 100 DEEP PATTERN ANALYSIS")
+    print("Analyzing 2 years of daily data")
+    print("="*60)
+
+def fetch_command(args, profiler):
+    """Fill or refresh the OHLCV cache so later runs can go --offline"""
+    source = build_source(args)
+
+    def fetch(symbol):
+        with profiler.stage('fetch', symbol) as stage:
+            df = source.history(symbol, period=args.period)
+            stage.rows = len(df)
+        return df
+
+    print(f"Fetching {args.period} of bars for {len(NIFTY_100)} stocks into {args.cache_dir}...")
+    _, report = bulk_fetch(NIFTY_100, fetch, workers=args.workers, retries=args.retries, progress=print_progress)
+    print(f"\n{report.summary()}")
+    if args.profile:
+        report_profile(profiler)
+    return 1 if report.failed else 0
+
+def sweep_command(args, profiler):
+    print_header()
+    sweep_mode(args, load_panel(args, build_source(args), profiler), profiler)
+    if args.profile:
+        report_profile(profiler)
+
+def analyze_command(args, profiler):
+    print_header()
+    if args.minute_dir:
+        intraday_mode(args, profiler)
+        if args.profile:
+            report_profile(profiler)
+        return
+
+    panel = load_panel(args, build_source(args), profiler)
+    analyzers = build_analyzers(args.max_streak, args.leadlag_thresholds, args.leadlag_lags, args.patterns)
+
+    if args.significance:
+        significance_mode(args, panel, analyzers, profiler)
+    elif args.walk_forward:
+        walk_forward_mode(args, panel, analyzers, profiler)
+    elif args.seasonality:
+        seasonality_mode(args, panel, profiler)
+    else:
+        report_mode(args, panel, analyzers, profiler)
+
+    if args.profile:
+        report_profile(profiler)
+        profile_hottest_analyzer(profiler, panel, analyzers, args.profile_dump)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['bench']:
+        # The benchmark's own options; imported here so other commands never load it
+        import bench_patterns
+        return bench_patterns.main(argv[1:])
+
+    args = parse_args(argv)
+    profiler = Profiler(enabled=args.profile)
+    command = {'fetch': fetch_command, 'analyze': analyze_command, 'sweep': sweep_command}[args.command]
+    return command(args, profiler)
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
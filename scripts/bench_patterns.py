@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Nifty pattern analyzers offline
+Runs every analyzer of analyze_patterns.py over seeded synthetic bars, reports
+bars/sec and peak traced memory per stage, and compares against a saved baseline.
+--imports instead checks the startup cost of each analyze_patterns.py command,
+and --equivalence that analyzing the universe as one panel gives the same
+results as analyzing each symbol on its own, with bars missing on some dates.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import analyze_patterns as ap
+from patterns.events import FeatureSet
+from patterns.panel import Panel
+from patterns.runner import merge_results, run_analyzers
+from patterns.stats import results_to_dict
+from patterns.synthetic import SyntheticFetcher, synthetic_universe
+
+BASELINE_VERSION = 1
+DEFAULT_TOLERANCE = 0.25
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyze_patterns.py')
+DEFAULT_IMPORT_BUDGET = 1.0  # seconds of module imports per command
+DEFAULT_MISSING = 0.02  # fraction of each symbol's trading days without a bar, for --equivalence
+# Modules only paths that download may import
+NETWORK_MODULES = ('yfinance',)
+
+
+def sector_lookup():
+    return {symbol: sector for sector, members in ap.SECTOR_MAP.items() for symbol in members}
+
+
+def load_universe(symbols, years, seed, missing=0.0):
+    fetcher = SyntheticFetcher(years=years, seed=seed, sectors=sector_lookup(), missing=missing)
+    return {symbol: ap.load_stock_data(symbol, period='max', source=fetcher) for symbol in symbols}
+
+
+def measure(fn, repeat=1, memory=True):
+    """(best wall seconds over `repeat` runs, peak traced MB of one more run, last result)"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def run_benchmark(symbols=100, years=2, seed=0, repeat=3, memory=True, progress=print):
+    """Time loading, panel building and every analyzer; returns the baseline dict"""
+    universe = synthetic_universe(symbols, ap.NIFTY_100)
+    analyzers = ap.build_analyzers()
+    stages = {}
+
+    def record(name, fn, bars=None, repeat=repeat):
+        seconds, peak, result = measure(fn, repeat, memory)
+        if bars is None:
+            bars = sum(len(df) for df in result.values() if df is not None)
+        stages[name] = {'seconds': round(seconds, 6),
+                        'bars_per_sec': round(bars / seconds) if seconds > 0 else None,
+                        'peak_mb': round(peak, 2) if peak is not None else None}
+        progress(format_row(name, stages[name]))
+        return result
+
+    progress(f"{symbols} symbols x {years} years, seed {seed}\n")
+    progress(format_header())
+    # Loading generates the bars and derives the analyzer columns, as a fetch would
+    data = record('load', lambda: load_universe(universe, years, seed), repeat=1)
+    panel = Panel.from_frames(data)
+    bars = int(panel.lengths.sum())
+
+    record('panel', lambda: Panel.from_frames(data), bars)
+    for analyzer in analyzers:
+        kwargs = analyzer.kwargs or {}
+        if analyzer.cross_sectional:
+            record(analyzer.name, lambda a=analyzer: a.collect(panel, **kwargs), bars)
+        else:
+            # A fresh FeatureSet each time, so every analyzer pays for its own features
+            record(analyzer.name, lambda a=analyzer: a.collect(FeatureSet(panel), **kwargs), bars)
+    record('all_shared', lambda: run_analyzers(panel, analyzers, workers=1), bars)
+
+    return {
+        'version': BASELINE_VERSION,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'scale': {'symbols': symbols, 'years': years, 'seed': seed},
+        'bars': bars,
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'pandas': pd.__version__, 'machine': platform.machine()},
+        'stages': stages,
+    }
+
+
+def format_header():
+    return f"{'Stage':<22} {'Seconds':>10} {'Bars/sec':>14} {'Peak MB':>10}\n" + "-" * 59
+
+
+def format_row(name, stage):
+    rate = f"{stage['bars_per_sec']:,}" if stage['bars_per_sec'] is not None else '-'
+    peak = f"{stage['peak_mb']:.1f}" if stage['peak_mb'] is not None else '-'
+    return f"{name:<22} {stage['seconds']:>10.4f} {rate:>14} {peak:>10}"
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Stages that got more than `tolerance` (a fraction) slower or hungrier than
+    the baseline, as (stage, metric, baseline, current) tuples.
+    """
+    if current['scale'] != baseline['scale']:
+        raise ValueError(f"baseline scale {baseline['scale']} does not match {current['scale']}")
+    regressions = []
+    for name, stage in current['stages'].items():
+        before = baseline['stages'].get(name)
+        if before is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            old, new = before.get(metric), stage.get(metric)
+            if old and new is not None and new > old * (1 + tolerance):
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def import_profile(args):
+    """(seconds spent importing, top-level modules imported) running analyze_patterns.py with `args`"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', SCRIPT] + args,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"analyze_patterns.py {' '.join(args)} failed:\n{proc.stderr[-2000:]}")
+    total, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        total += int(own)
+        modules.add(name.strip().split('.')[0])
+    return total / 1e6, modules
+
+
+def check_imports(budget=DEFAULT_IMPORT_BUDGET, progress=print):
+    """
+    Startup of every command (its --help) plus a real --offline analysis of a few
+    synthetic symbols, each in a fresh interpreter. Returns the problems found:
+    a command importing for longer than `budget` seconds, or importing a
+    network-only module.
+    """
+    with tempfile.TemporaryDirectory() as data_dir:
+        fetcher = SyntheticFetcher(years=1, seed=0, sectors=sector_lookup())
+        for symbol in ap.NIFTY_100[:5]:
+            fetcher.bars(symbol).to_csv(os.path.join(data_dir, f"{symbol}.csv"))
+        runs = [[command, '--help'] for command in ap.COMMANDS]
+        runs.append(['analyze', '--offline', '--data-dir', data_dir, '--no-report', '--jobs', '1'])
+
+        problems = []
+        for args in runs:
+            seconds, modules = import_profile(args)
+            label = ' '.join(arg if arg != data_dir else 'DIR' for arg in args)
+            progress(f"  {label:<55} {seconds:6.3f}s importing {len(modules)} modules")
+            if seconds > budget:
+                problems.append(f"{label}: {seconds:.3f}s of imports exceeds {budget:.3f}s")
+            for name in NETWORK_MODULES:
+                if name in modules:
+                    problems.append(f"{label}: imports {name} without downloading")
+    return problems
+
+
+def check_equivalence(symbols=30, years=2, seed=0, missing=DEFAULT_MISSING, progress=print):
+    """
+    Run every per-symbol analyzer over the whole universe as one panel and
+    over each symbol's panel alone, with `missing` of the bars dropped. The
+    joint panel pads each symbol to the union of dates, so this checks that
+    shifts, windows and forward returns step over a symbol's own bars only.
+    Returns the problems found: a result that differs between the two.
+    """
+    data = load_universe(synthetic_universe(symbols, ap.NIFTY_100), years, seed, missing)
+    panel = Panel.from_frames(data)
+    analyzers = [analyzer for analyzer in ap.build_analyzers() if not analyzer.cross_sectional]
+    joint = run_analyzers(panel, analyzers, workers=1)
+    progress(f"  {len(panel.symbols)} symbols, {len(panel.dates)} dates, {int(panel.lengths.sum()):,} bars"
+             f"{' with gaps' if panel.has_gaps() else ''}")
+
+    problems = []
+    for analyzer in analyzers:
+        kwargs = analyzer.kwargs or {}
+        alone = merge_results([analyzer.collect(Panel.from_frames({symbol: df}), **kwargs)
+                               for symbol, df in data.items() if df is not None])
+        expected, found = _flat(results_to_dict(alone)), _flat(results_to_dict(joint[analyzer.name]))
+        differ = [key for key in expected.keys() | found.keys()
+                  if key not in expected or key not in found or not _same(expected[key], found[key])]
+        progress(f"  {analyzer.name:<20} {len(expected):6d} values, {len(differ)} differ")
+        problems += [f"{analyzer.name}: {key} is {found.get(key)} in one panel, "
+                     f"{expected.get(key)} per symbol" for key in sorted(differ)]
+    return problems
+
+
+def _flat(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flat(value, f"{prefix}{key}/"))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _same(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return bool(np.isclose(a, b, rtol=1e-9, atol=1e-9, equal_nan=True))
+    return a == b
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pattern analyzers on synthetic data")
+    parser.add_argument('--symbols', type=int, default=100, help="number of symbols (default: %(default)s)")
+    parser.add_argument('--years', type=float, default=2, help="years of daily bars (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="generator seed (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage, best kept (default: %(default)s)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--save', help="write the results as a baseline JSON file")
+    parser.add_argument('--compare', help="baseline JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before flagging, as a fraction (default: %(default)s)")
+    parser.add_argument('--imports', action='store_true',
+                        help="check each analyze_patterns.py command's import time instead of benchmarking")
+    parser.add_argument('--import-budget', type=float, default=DEFAULT_IMPORT_BUDGET,
+                        help="max seconds of imports per command for --imports (default: %(default)s)")
+    parser.add_argument('--equivalence', action='store_true',
+                        help="check one-panel results against per-symbol results instead of benchmarking")
+    parser.add_argument('--missing', type=float, default=DEFAULT_MISSING,
+                        help="fraction of bars dropped for --equivalence (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.imports:
+        print(f"Import time per command (budget {args.import_budget:.3f}s):")
+        problems = check_imports(args.import_budget)
+        for problem in problems:
+            print(f"  FAIL {problem}")
+        if not problems:
+            print("All commands within budget, none importing network modules")
+        return 1 if problems else 0
+    if args.equivalence:
+        print(f"One panel vs per-symbol panels, {args.missing:.0%} of bars missing:")
+        problems = check_equivalence(args.symbols, args.years, args.seed, args.missing)
+        for problem in problems[:20]:
+            print(f"  FAIL {problem}")
+        if not problems:
+            print("Results identical")
+        return 1 if problems else 0
+
+    result = run_benchmark(args.symbols, args.years, args.seed, args.repeat, memory=not args.no_memory)
+    print(f"\n{result['bars']:,} bars")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if not regressions:
+            print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+            return 0
+        print(f"\nREGRESSIONS against {args.compare} (tolerance {args.tolerance:.0%}):")
+        for name, metric, old, new in regressions:
+            print(f"  {name}: {metric} {old} -> {new} ({(new / old - 1) * 100:+.0f}%)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
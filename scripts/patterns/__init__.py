@@ -0,0 +1,3 @@
+"""
+Helpers for analyze_patterns.py - vectorized building blocks shared by the analyzers
+"""
@@ -0,0 +1,162 @@
+"""
+Persistent per-symbol OHLCV cache
+
+Layout: <root>/<symbol>/<column>.npy - one memory-mappable array per column, with
+dates stored as UTC nanoseconds in Date.npy - plus meta.json describing what the
+files cover and when they were fetched.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from patterns.sources import OHLCV_COLUMNS, YFinanceFetcher, period_start, select_range
+
+DEFAULT_TTL = 6 * 60 * 60  # seconds a cached symbol is served without asking the source
+ADJUSTMENT_COLUMNS = ('Dividends', 'Stock Splits')
+
+
+class OHLCVCache:
+    """
+    Cache in front of a source, refreshed incrementally.
+
+    - Within `ttl` seconds of the last fetch cached bars are served as-is.
+    - After that only bars from the last cached date onward are fetched and
+      appended; the last cached bar is replaced since it may have been intraday.
+    - A dividend or split among the new bars invalidates the back-adjusted
+      history and forces a full download, as does a period reaching further
+      back than the cache covers.
+    - offline=True never calls the source; uncached symbols come back empty.
+
+    The cache itself has the source interface, so it can stand in for a fetcher.
+    """
+
+    def __init__(self, root, source=None, ttl=DEFAULT_TTL, offline=False, clock=time.time):
+        self.root = root
+        self.source = source if source is not None else YFinanceFetcher()
+        self.ttl = ttl
+        self.offline = offline
+        self.clock = clock
+
+    def history(self, symbol, period=None, start=None):
+        """Bars for `symbol` from `start` or covering `period`, refreshing from the source if needed"""
+        now = pd.Timestamp(self.clock(), unit='s', tz='UTC')
+        wanted = _utc(start) if start is not None else period_start(period, now)
+        meta = self._read_meta(symbol)
+        df = self.load(symbol) if meta is not None else None
+
+        if self.offline:
+            if df is None:
+                return pd.DataFrame(columns=OHLCV_COLUMNS)
+        elif df is None or not _covers(meta, wanted):
+            df = self._download(symbol, period, start, wanted)
+        elif self.clock() - meta['fetched_at'] >= self.ttl:
+            df = self._refresh(symbol, df, period, start, wanted)
+
+        # Periods count back from the newest bar so stale/offline data still yields a full window
+        return select_range(df, period, start, df.index[-1] if len(df) else now)
+
+    def columns(self, symbol):
+        """Memory-mapped column arrays for a cached symbol, or None if it is not cached"""
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return None
+        directory = self._dir(symbol)
+        arrays = {}
+        for name in ['Date'] + OHLCV_COLUMNS:
+            arrays[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+            if len(arrays[name]) != meta['rows']:
+                return None  # interrupted write
+        return arrays
+
+    def load(self, symbol):
+        """Everything cached for `symbol` as a DataFrame, or None"""
+        arrays = self.columns(symbol)
+        if arrays is None:
+            return None
+        meta = self._read_meta(symbol)
+        index = pd.DatetimeIndex(np.asarray(arrays['Date']).astype('datetime64[ns]'), name='Date')
+        index = index.tz_localize('UTC')
+        index = index.tz_convert(meta['tz']) if meta['tz'] else index.tz_localize(None)
+        return pd.DataFrame({name: np.array(arrays[name]) for name in OHLCV_COLUMNS}, index=index)
+
+    def _download(self, symbol, period, start, wanted):
+        df = self.source.history(symbol, period=period, start=start)
+        if len(df) > 0:
+            self._write(symbol, df, wanted)
+        return df[OHLCV_COLUMNS] if len(df) > 0 else pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    def _refresh(self, symbol, df, period, start, wanted):
+        meta = self._read_meta(symbol)
+        new = self.source.history(symbol, start=df.index[-1])
+        if len(new) == 0:
+            self._write_meta(symbol, dict(meta, fetched_at=self.clock()))
+            return df
+        for name in ADJUSTMENT_COLUMNS:
+            if name in new.columns and (new[name].fillna(0) != 0).any():
+                return self._download(symbol, period, start, wanted)
+
+        first_new = new.index[0].normalize()
+        merged = pd.concat([df[df.index.normalize() < first_new], new[OHLCV_COLUMNS]])
+        self._write(symbol, merged, _meta_start(meta))
+        return merged
+
+    def _write(self, symbol, df, covers_from):
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else None
+        utc = index.tz_convert('UTC').tz_localize(None) if tz else index
+        columns = {'Date': utc.as_unit('ns').asi8}
+        for name in OHLCV_COLUMNS:
+            columns[name] = df[name].to_numpy(dtype=np.float64)
+
+        for name, values in columns.items():
+            tmp = os.path.join(directory, f"{name}.tmp.npy")
+            np.save(tmp, values)
+            os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+
+        self._write_meta(symbol, {
+            'symbol': symbol,
+            'tz': tz,
+            'rows': len(df),
+            'covers_from': covers_from.isoformat() if covers_from is not None else None,
+            'last_date': index[-1].isoformat(),
+            'fetched_at': self.clock(),
+        })
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, symbol)
+
+    def _read_meta(self, symbol):
+        path = os.path.join(self._dir(symbol), 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_meta(self, symbol, meta):
+        path = os.path.join(self._dir(symbol), 'meta.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+
+def _utc(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+
+def _meta_start(meta):
+    return pd.Timestamp(meta['covers_from']) if meta['covers_from'] else None
+
+
+def _covers(meta, wanted):
+    """Whether the cached download reaches back to `wanted` (None = full history)"""
+    covered = _meta_start(meta)
+    if covered is None:
+        return True
+    return wanted is not None and wanted >= covered
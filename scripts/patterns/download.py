@@ -0,0 +1,134 @@
+"""
+Concurrent bulk download of a symbol universe
+
+A thread pool bounds how many fetches are in flight, a shared token bucket
+bounds how fast requests reach the network, and failed symbols are retried
+with exponential backoff. Results always come back in input order.
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class TokenBucket:
+    """Thread-safe limiter allowing `rate` acquisitions per second, in bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+class RateLimitedSource:
+    """Wraps a source so every history() call first takes a token from `bucket`"""
+
+    def __init__(self, source, bucket):
+        self.source = source
+        self.bucket = bucket
+
+    def history(self, symbol, period=None, start=None):
+        self.bucket.acquire()
+        return self.source.history(symbol, period=period, start=start)
+
+
+class FetchReport:
+    """What happened to each symbol of a bulk fetch"""
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.attempts = {symbol: 0 for symbol in self.symbols}
+        self.errors = {}
+        self.elapsed = 0.0
+
+    @property
+    def failed(self):
+        return [symbol for symbol in self.symbols if symbol in self.errors]
+
+    @property
+    def succeeded(self):
+        return [symbol for symbol in self.symbols if symbol not in self.errors]
+
+    def summary(self):
+        retried = sum(1 for n in self.attempts.values() if n > 1)
+        lines = [f"Fetched {len(self.succeeded)}/{len(self.symbols)} symbols in {self.elapsed:.1f}s"
+                 f" ({retried} needed retries)"]
+        for symbol in self.failed:
+            lines.append(f"  FAILED {symbol} after {self.attempts[symbol]} attempt(s): {self.errors[symbol]}")
+        return "\n".join(lines)
+
+
+def fetch_with_retry(fetch, symbol, retries=3, backoff=0.5, report=None, sleep=time.sleep):
+    """
+    Call fetch(symbol), retrying exceptions up to `retries` more times.
+
+    Waits backoff * 2**n (plus up to 50% jitter) before retry n. A None or
+    empty result means the symbol has no data and is not retried, and neither
+    is a ValueError - a bad argument such as the period fails the same way
+    every time - except a JSONDecodeError, i.e. a garbled response.
+    """
+    for attempt in range(retries + 1):
+        if report is not None:
+            report.attempts[symbol] += 1
+        try:
+            df = fetch(symbol)
+        except Exception as e:
+            permanent = isinstance(e, ValueError) and not isinstance(e, json.JSONDecodeError)
+            if attempt == retries or permanent:
+                raise
+            delay = backoff * (2 ** attempt)
+            sleep(delay + random.uniform(0, delay / 2))
+            continue
+        if df is None or len(df) == 0:
+            raise LookupError("no data")
+        return df
+
+
+def bulk_fetch(symbols, fetch, workers=8, retries=3, backoff=0.5, progress=None):
+    """
+    Fetch every symbol on a pool of `workers` threads.
+
+    progress(done, total, symbol, df, error) is called as each symbol finishes.
+    Returns (data, report) where data maps symbol -> DataFrame in the order of
+    `symbols`, leaving out the symbols that failed.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    report = FetchReport(symbols)
+    fetched = {}
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(fetch_with_retry, fetch, symbol, retries, backoff, report): symbol
+                   for symbol in symbols}
+        for done, future in enumerate(as_completed(futures), 1):
+            symbol = futures[future]
+            try:
+                fetched[symbol] = future.result()
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                report.errors[symbol] = error
+            if progress is not None:
+                progress(done, len(symbols), symbol, fetched.get(symbol), error)
+
+    report.elapsed = time.perf_counter() - started
+    data = {symbol: fetched[symbol] for symbol in symbols if symbol in fetched}
+    return data, report
@@ -0,0 +1,258 @@
+"""
+Pattern expression language
+
+A pattern is a boolean expression over the panel's columns, e.g.
+
+    gap > 1 and intraday < -0.5
+    close > prev(max(high, 20)) and volume_ratio >= 2
+    not (returns > 0) and low < prev(min(low, 52))
+
+Columns are named case-insensitively (gap, intraday, returns, volume_ratio,
+open, high, low, close, volume). Supported: and / or / not, comparisons
+(chains allowed), + - * /, numbers and the window functions
+
+    max(x, n)  min(x, n)  mean(x, n)  rolling over the last n bars, today included
+    prev(x, k=1)                      x as of k bars ago
+
+Expressions are parsed once into a graph of nodes shared by every pattern of
+a PatternSet: a subexpression used by many patterns (the same rolling window,
+the same comparison) is computed once per evaluation, as one NumPy operation
+over the whole (dates x symbols) matrix. A bar matches only when every column
+value its comparisons read is known, so NaN history never counts as an event.
+"""
+
+import ast
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from patterns.events import Event
+from patterns.panel import PANEL_FIELDS
+
+COMPARISONS = {ast.Gt: '>', ast.GtE: '>=', ast.Lt: '<', ast.LtE: '<=', ast.Eq: '==', ast.NotEq: '!='}
+# Operator with its operands swapped: `1 < gap` is stored as `gap > 1`
+FLIPPED = {'>': '<', '>=': '<=', '<': '>', '<=': '>=', '==': '==', '!=': '!='}
+ARITHMETIC = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/'}
+WINDOWS = ('max', 'min', 'mean')
+
+_UFUNCS = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal,
+           '==': np.equal, '!=': np.not_equal, '+': np.add, '-': np.subtract,
+           '*': np.multiply, '/': np.divide}
+
+
+class PatternSet:
+    """
+    Named patterns compiled into one shared node graph.
+
+    Nodes are tuples - ('col', name), ('num', value), ('cmp', op, a, b),
+    ('and', *terms), ('or', *terms), ('not', a), ('neg', a), ('arith', op, a, b),
+    ('window', fn, a, n), ('prev', a, k), ('known', a) - and equal
+    subexpressions are the same tuple, so each is evaluated once. `lookback`
+    is how many bars before a bar its deepest pattern reads, windows and
+    prev() nested inside each other adding up.
+    """
+
+    def __init__(self, patterns, columns=PANEL_FIELDS):
+        self.columns = {name.lower(): name for name in columns}
+        self.roots = {}
+        for name, text in patterns.items():
+            try:
+                tree = ast.parse(text.strip(), mode='eval').body
+            except SyntaxError as e:
+                raise ValueError(f"Pattern {name!r}: invalid syntax in {text!r}") from e
+            root = self._boolean(tree, name)
+            self.roots[name] = _conjunction([root] + [('known', node) for node in sorted(_operands(root), key=repr)])
+        self.nodes = _topological(self.roots.values())
+        depth = {}
+        for node in self.nodes:
+            depth[node] = max((depth[child] for child in _children(node)), default=0) + _reach(node)
+        self.lookback = max((depth[root] for root in self.roots.values()), default=0)
+
+    def masks(self, cols):
+        """{pattern: boolean (dates x symbols) array}, evaluating each shared node once"""
+        values = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for node in self.nodes:
+                values[node] = _evaluate(node, values, cols)
+        return {name: values[root] for name, root in self.roots.items()}
+
+    def features(self, cols):
+        """Every pattern's mask as a `pattern:<name>` column, for FeatureSet.add / event_study"""
+        return {f'pattern:{name}': mask for name, mask in self.masks(cols).items()}
+
+    def events(self):
+        """One Event per pattern, reading the mask `features` added"""
+        return [Event(name, lambda d, key=f'pattern:{name}': d[key]) for name in self.roots]
+
+    def _boolean(self, node, name):
+        if isinstance(node, ast.BoolOp):
+            terms = [self._boolean(value, name) for value in node.values]
+            return _conjunction(terms) if isinstance(node.op, ast.And) else _flatten('or', terms)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ('not', self._boolean(node.operand, name))
+        if isinstance(node, ast.Compare):
+            terms = []
+            left = self._numeric(node.left, name)
+            for op, comparator in zip(node.ops, node.comparators):
+                if type(op) not in COMPARISONS:
+                    raise ValueError(f"Pattern {name!r}: unsupported comparison {type(op).__name__}")
+                right = self._numeric(comparator, name)
+                terms.append(_comparison(COMPARISONS[type(op)], left, right))
+                left = right
+            return _conjunction(terms)
+        raise ValueError(f"Pattern {name!r}: expected a comparison, got {ast.unparse(node)!r}")
+
+    def _numeric(self, node, name):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            return ('num', float(node.value))
+        if isinstance(node, ast.Name):
+            if node.id.lower() not in self.columns:
+                raise ValueError(f"Pattern {name!r}: unknown column {node.id!r} "
+                                 f"(known: {', '.join(sorted(self.columns))})")
+            return ('col', self.columns[node.id.lower()])
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self._numeric(node.operand, name)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            return ('num', -operand[1]) if operand[0] == 'num' else ('neg', operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC:
+            return ('arith', ARITHMETIC[type(node.op)], self._numeric(node.left, name),
+                    self._numeric(node.right, name))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            return self._call(node.func.id.lower(), node.args, name)
+        raise ValueError(f"Pattern {name!r}: unsupported expression {ast.unparse(node)!r}")
+
+    def _call(self, fn, args, name):
+        if fn in WINDOWS and len(args) == 2:
+            return ('window', fn, self._numeric(args[0], name), _bars(args[1], name, minimum=1))
+        if fn == 'prev' and len(args) in (1, 2):
+            return ('prev', self._numeric(args[0], name), _bars(args[1], name) if len(args) == 2 else 1)
+        raise ValueError(f"Pattern {name!r}: unknown function {fn}() or wrong number of arguments")
+
+
+@lru_cache(maxsize=32)
+def _compiled(items):
+    return PatternSet(dict(items))
+
+
+def compile_patterns(patterns):
+    """PatternSet for {name: expression}, compiled once per process for the same patterns"""
+    return _compiled(tuple(patterns.items()))
+
+
+def parse_pattern_lines(lines):
+    """{name: expression} from `name: expression` lines (blank lines and # comments skipped)"""
+    patterns = {}
+    for number, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        name, sep, text = line.partition(':')
+        if not sep or not name.strip() or not text.strip():
+            raise ValueError(f"Line {number}: expected 'name: expression', got {line!r}")
+        patterns[name.strip()] = text.strip()
+    return patterns
+
+
+def _bars(node, name, minimum=0):
+    if not (isinstance(node, ast.Constant) and isinstance(node.value, int)
+            and not isinstance(node.value, bool) and node.value >= minimum):
+        raise ValueError(f"Pattern {name!r}: bar count must be an integer >= {minimum}, "
+                         f"got {ast.unparse(node)!r}")
+    return node.value
+
+
+def _comparison(op, left, right):
+    # Constants on the right, so `1 < gap` and `gap > 1` share a node
+    if left[0] == 'num' and right[0] != 'num':
+        return ('cmp', FLIPPED[op], right, left)
+    return ('cmp', op, left, right)
+
+
+def _flatten(kind, terms):
+    flat = set()
+    for term in terms:
+        flat.update(term[1:] if term[0] == kind else [term])
+    # Sorted so term order does not matter: `a and b` is `b and a`
+    flat = sorted(flat, key=repr)
+    return flat[0] if len(flat) == 1 else (kind, *flat)
+
+
+def _conjunction(terms):
+    return _flatten('and', terms)
+
+
+def _operands(node):
+    """Non-constant operands of every comparison under node"""
+    if node[0] == 'cmp':
+        return {operand for operand in node[2:] if operand[0] != 'num'}
+    if node[0] in ('and', 'or', 'not'):
+        return set().union(*(_operands(child) for child in node[1:]))
+    return set()
+
+
+def _children(node):
+    kind = node[0]
+    if kind in ('and', 'or'):
+        return node[1:]
+    if kind in ('not', 'neg', 'known'):
+        return node[1:2]
+    if kind in ('cmp', 'arith'):
+        return node[2:4]
+    if kind == 'window':
+        return node[2:3]
+    if kind == 'prev':
+        return node[1:2]
+    return ()
+
+
+def _reach(node):
+    """Bars before the current one a node reads beyond its children"""
+    if node[0] == 'window':
+        return node[3] - 1
+    if node[0] == 'prev':
+        return node[2]
+    return 0
+
+
+def _topological(roots):
+    """Every node under roots, each once, children before parents"""
+    order, seen = [], set()
+    stack = [(root, False) for root in roots]
+    while stack:
+        node, expanded = stack.pop()
+        if node in seen:
+            continue
+        if expanded:
+            seen.add(node)
+            order.append(node)
+            continue
+        stack.append((node, True))
+        stack.extend((child, False) for child in _children(node) if child not in seen)
+    return order
+
+
+def _evaluate(node, values, cols):
+    kind = node[0]
+    if kind == 'col':
+        return np.asarray(cols[node[1]], dtype=np.float64)
+    if kind == 'num':
+        return node[1]
+    if kind in ('cmp', 'arith'):
+        return _UFUNCS[node[1]](values[node[2]], values[node[3]])
+    if kind == 'and':
+        return np.logical_and.reduce([values[term] for term in node[1:]])
+    if kind == 'or':
+        return np.logical_or.reduce([values[term] for term in node[1:]])
+    if kind == 'not':
+        return ~values[node[1]]
+    if kind == 'neg':
+        return -values[node[1]]
+    if kind == 'known':
+        return ~np.isnan(values[node[1]])
+    if kind == 'window':
+        # Per symbol (column); a window reaching before a symbol's listing is NaN
+        return getattr(pd.DataFrame(values[node[2]]).rolling(node[3]), node[1])().to_numpy()
+    return pd.DataFrame(values[node[1]]).shift(node[2]).to_numpy()
@@ -0,0 +1,211 @@
+"""
+Vectorized event-study engine
+
+An event is a boolean mask over the daily bars of a Panel. The engine gathers
+the forward outcomes (next day, N-day cumulative, gap fill) of every masked bar
+with whole-matrix operations instead of walking each symbol row by row.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from patterns.panel import as_panel
+from patterns.profiling import Profiler
+from patterns.stats import OutcomeStats
+
+# name: key in the results dict
+# mask: function(cols) -> boolean (bars x symbols) DataFrame/array, over FeatureSet.cols
+# horizons: outcome names collected for this event (None = every horizon)
+Event = namedtuple('Event', ['name', 'mask', 'horizons'], defaults=[None])
+
+# Raw outcomes of one (event, outcome) for significance and walk-forward tests:
+# the symbol code, panel row and value of every event, plus the pool of all
+# eligible bars of the study
+EventSample = namedtuple('EventSample', ['symbols', 'rows', 'values', 'pool'])
+
+# Outcomes of every eligible bar grouped by symbol: symbol j's are
+# values[offsets[j]:offsets[j + 1]], averaging means[j]
+OutcomePool = namedtuple('OutcomePool', ['values', 'offsets', 'means'])
+
+
+def compound_forward_returns(returns, days):
+    """Cumulative % return over the next `days` bars, compounded from daily % returns (Series or DataFrame)"""
+    if days == 1:
+        return returns.shift(-1)
+    # NaN returns count as flat days, like Series.prod() skipping them
+    growth = (1 + returns / 100).fillna(1)
+    total = growth.shift(-1)
+    for k in range(2, days + 1):
+        total = total * growth.shift(-k)
+    return (total - 1) * 100
+
+
+def close_forward_returns(close, days):
+    """% change from today's close to the close `days` bars ahead"""
+    return ((close.shift(-days) / close) - 1) * 100
+
+
+def gap_filled(cols):
+    """Gap up traded back down to the previous close, or gap down traded back up to it"""
+    prev_close = cols['Close'].shift(1)
+    gap = cols['Gap']
+    return ((gap > 0) & (cols['Low'] <= prev_close)) | ((gap < 0) & (cols['High'] >= prev_close))
+
+
+class FeatureSet:
+    """
+    A panel's columns plus memoized derived features and forward returns.
+
+    Analyzers sharing a FeatureSet compute each rolling window, streak index
+    and forward-return horizon once instead of once per analyzer.
+
+    Columns are in Panel.compact's layout, so shifts, windows and forward
+    returns step over each symbol's own bars even where other symbols traded
+    on dates it has no bar for; `rows` maps each of their rows back to the
+    panel row (-1 on padding) and `positions` holds its bar number.
+
+    `since` (UTC nanoseconds per symbol, or None) restricts every study to bars
+    dated after it; `frontier` records, per symbol, the last row any study
+    could use, i.e. the newest bar whose forward outcomes have all matured.
+    When `samples` is a dict, studies also store an EventSample in it per
+    (event, outcome). Building features and forward returns are timed as
+    'features:*' stages of `profiler`.
+    """
+
+    def __init__(self, panel, since=None, samples=None, profiler=None):
+        self.panel = panel
+        fields, self.rows = panel.compact()
+        index = panel.dates if fields is panel.fields else None
+        self.cols = {name: pd.DataFrame(values, index=index, columns=panel.symbols, copy=False)
+                     for name, values in fields.items()}
+        valid = self.rows >= 0
+        self.positions = np.where(valid, np.cumsum(valid, axis=0) - 1 + panel.offset[None, :], -1)
+        self.since = since
+        self.samples = samples
+        self.profiler = profiler or Profiler(enabled=False)
+        self.frontier = np.full(len(panel.symbols), -1, dtype=np.int64)
+        self._built = set()
+        self._forward = {}
+
+    def add(self, builder):
+        """Columns with `builder`'s features added (each builder runs at most once)"""
+        if builder is not None and builder not in self._built:
+            name = builder.__qualname__.split('.<locals>')[0]
+            with self.profiler.stage(f'features:{name}', rows=self._rows()):
+                self.cols.update(builder(self.cols))
+            self._built.add(builder)
+        return self.cols
+
+    def forward(self, method, days):
+        """(rows x symbols) forward % returns over `days` of each symbol's bars"""
+        key = (method, days)
+        if key not in self._forward:
+            with self.profiler.stage(f'features:forward_{method}', rows=self._rows()):
+                if method == 'close':
+                    values = close_forward_returns(self.cols['Close'], days)
+                else:
+                    values = compound_forward_returns(self.cols['Returns'], days)
+                self._forward[key] = values.to_numpy()
+        return self._forward[key]
+
+    def panel_rows(self, positions):
+        """Panel row of each symbol's bar number `positions[j]` (-1 if outside the panel)"""
+        found = self.positions == positions[None, :]
+        if not found.size:
+            return np.full(len(positions), -1, dtype=np.int64)
+        index = np.argmax(found, axis=0)
+        return np.where(found.any(axis=0), self.rows[index, np.arange(len(index))], -1)
+
+    def _rows(self):
+        return int(self.panel.lengths.sum())
+
+
+def as_features(data):
+    """Accept a FeatureSet, a Panel or a dict of per-symbol frames"""
+    return data if isinstance(data, FeatureSet) else FeatureSet(as_panel(data))
+
+
+def event_study(data, events, horizons, start=1, stop=1, min_rows=10,
+                method='compound', require=(), features=None, flags=None, dropna=False, sketch=False):
+    """
+    Collect forward outcomes for every event over every symbol of a panel
+    (or a FeatureSet over one, to share features between studies).
+
+    horizons maps outcome name -> number of bars ahead, e.g. {'next_day': 1}.
+    Bars [start, n - stop) of each symbol's n bars are eligible, symbols with
+    fewer than `min_rows` bars are skipped, and bars where any `require` column
+    is NaN are skipped. Masks, `features` and `flags` receive the FeatureSet's
+    columns (one row per bar of each symbol, see FeatureSet); `features` adds derived columns and `flags`
+    maps name -> function(cols) whose True bars are counted per event.
+    dropna=True leaves NaN outcomes out of the statistics; sketch=True also
+    keeps a quantile sketch per outcome.
+
+    Returns {event: {outcome: OutcomeStats, flag: count, 'total': count}}.
+    """
+    data = as_features(data)
+    panel = data.panel
+    flags = flags or {}
+    results = {}
+    for event in events:
+        outcome = {name: OutcomeStats(sketch) for name in (event.horizons or horizons)}
+        outcome.update({name: 0 for name in flags})
+        outcome['total'] = 0
+        results[event.name] = outcome
+
+    cols = data.add(features)
+
+    position = data.positions
+    lengths = panel.lengths
+    eligible = (position >= start) & (position < lengths - stop) & (lengths >= min_rows)
+    usable = (lengths >= min_rows) & (lengths - stop > start)
+    data.frontier = np.maximum(data.frontier, np.where(usable, data.panel_rows(lengths - 1 - stop), -1))
+    if data.since is not None:
+        eligible &= _utc_stamps(panel.dates)[np.maximum(data.rows, 0)] > data.since[None, :]
+    for name in require:
+        eligible &= cols[name].notna().to_numpy(dtype=bool)
+
+    forward = {name: data.forward(method, days) for name, days in horizons.items()}
+    flagged = {name: np.asarray(fn(cols), dtype=bool) for name, fn in flags.items()}
+    pools = {}
+
+    for event in events:
+        mask = np.asarray(event.mask(cols), dtype=bool) & eligible
+        # Transposed so hits come out symbol by symbol, like a per-symbol loop
+        symbols, rows = np.nonzero(mask.T)
+        if len(rows) == 0:
+            continue
+        outcome = results[event.name]
+        outcome['total'] += len(rows)
+        for name in (event.horizons or horizons):
+            values = forward[name][rows, symbols]
+            if data.samples is not None:
+                if name not in pools:
+                    pools[name] = outcome_pool(eligible, forward[name])
+                keep = ~np.isnan(values)
+                data.samples[(event.name, name)] = EventSample(symbols[keep], data.rows[rows, symbols][keep],
+                                                               values[keep], pools[name])
+            if dropna:
+                values = values[~np.isnan(values)]
+            outcome[name].add_array(values)
+        for name, values in flagged.items():
+            outcome[name] += int(values[rows, symbols].sum())
+
+    return results
+
+
+def outcome_pool(eligible, forward):
+    """OutcomePool of the non-NaN forward outcomes of every eligible bar"""
+    symbols, rows = np.nonzero((eligible & ~np.isnan(forward)).T)
+    values = forward[rows, symbols]
+    counts = np.bincount(symbols, minlength=forward.shape[1])
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.bincount(symbols, weights=values, minlength=forward.shape[1]) / counts
+    return OutcomePool(values, offsets, means)
+
+
+def _utc_stamps(dates):
+    """int64 UTC nanoseconds of a DatetimeIndex (naive dates are taken as UTC)"""
+    return dates.as_unit('ns').asi8
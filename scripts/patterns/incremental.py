@@ -0,0 +1,138 @@
+"""
+Incremental daily updates of the per-symbol pattern statistics
+
+Each analyzer keeps a JSON state file holding its merged accumulators and,
+per symbol, the date of the last bar already folded in. A run only studies
+bars after that date, on a tail of the panel long enough to rebuild the
+rolling windows (52-week highs, volume averages, streaks) from the cached
+history, and merges the new partial results into the stored ones.
+
+A bar is folded in once every forward horizon of its analyzer has matured
+(the `stop` bound of event_study), so the accumulated statistics equal those
+of a full run over the same history.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from patterns.events import FeatureSet
+from patterns.runner import merge_results
+from patterns.stats import results_from_dict, results_to_dict
+
+STATE_VERSION = 1
+
+# Bars of history kept before the oldest unprocessed bar: covers the 252-day
+# rolling windows shifted by a bar, plus the leading bars event_study skips
+LOOKBACK = 260
+
+NEVER = np.iinfo(np.int64).min
+
+
+def state_path(state_dir, name):
+    return os.path.join(state_dir, f"{name}.json")
+
+
+def new_state(name, params):
+    return {'version': STATE_VERSION, 'analyzer': name, 'params': params,
+            'processed_through': {}, 'results': None}
+
+
+def load_state(path, name, params):
+    """
+    Stored state for an analyzer, or a fresh one when there is none or it was
+    built with other parameters (the stored statistics would not be comparable).
+    """
+    params = _normalized(params)
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return new_state(name, params)
+    if state.get('version') != STATE_VERSION or state.get('params') != params:
+        print(f"  {name}: stored state does not match the current parameters, rebuilding")
+        return new_state(name, params)
+    state['results'] = results_from_dict(state['results'])
+    return state
+
+
+def save_state(path, state):
+    """Write the state atomically (temp file, then rename)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    data = dict(state, results=results_to_dict(state['results']))
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def update(panel, analyzer, state, lookback=LOOKBACK):
+    """
+    Fold the bars of `panel` not yet in `state` into it.
+
+    Returns the analyzer's partial results for just those bars.
+    """
+    processed = state['processed_through']
+    since = np.array([pd.Timestamp(processed[symbol]).value if symbol in processed else NEVER
+                      for symbol in panel.symbols], dtype=np.int64)
+
+    # Oldest bar any symbol still needs, minus `lookback` of that symbol's own
+    # bars for the rolling windows (more rows where it has no bar on some dates)
+    stamps = panel.dates.as_unit('ns').asi8
+    pending = np.searchsorted(stamps, since, side='right')
+    start_row = 0
+    if len(pending):
+        # counts[r, j]: symbol j's bars in rows before r
+        counts = np.vstack([np.zeros((1, len(panel.symbols)), dtype=np.int64), np.cumsum(panel.bars, axis=0)])
+        need = counts[pending, np.arange(len(pending))] - lookback
+        rows = np.where(need < 0, np.maximum(panel.first, 0), (counts <= need[None, :]).sum(axis=0) - 1)
+        start_row = max(0, int(rows.min()))
+
+    tail = panel.tail(start_row)
+    features = FeatureSet(tail, since=since)
+    new = analyzer.collect(features, **(analyzer.kwargs or {}))
+
+    state['results'] = new if state['results'] is None else merge_results([state['results'], new])
+    for symbol, row in zip(tail.symbols, features.frontier):
+        if row >= 0:
+            date = tail.dates[row].isoformat()
+            if symbol not in processed or pd.Timestamp(date) > pd.Timestamp(processed[symbol]):
+                processed[symbol] = date
+    return new
+
+
+def run_incremental(panel, analyzers, state_dir, lookback=LOOKBACK):
+    """
+    Update every per-symbol analyzer's stored state with the panel's new bars.
+
+    Cross-sectional analyzers are cheap single matrix products over the
+    panel, so they are recomputed rather than persisted. Returns
+    ({analyzer name: accumulated results}, {analyzer name: new events}).
+    """
+    results = {}
+    added = {}
+    for analyzer in analyzers:
+        if analyzer.cross_sectional:
+            results[analyzer.name] = analyzer.collect(panel, **(analyzer.kwargs or {}))
+            continue
+        path = state_path(state_dir, analyzer.name)
+        state = load_state(path, analyzer.name, analyzer.kwargs or {})
+        new = update(panel, analyzer, state, lookback)
+        save_state(path, state)
+        results[analyzer.name] = state['results']
+        added[analyzer.name] = count_events(new)
+    return results, added
+
+
+def count_events(results):
+    """Number of events in a results dict (the sum of its 'total' counts)"""
+    if not isinstance(results, dict):
+        return 0
+    return sum(value if key == 'total' else count_events(value) for key, value in results.items())
+
+
+def _normalized(params):
+    """params as they read back from JSON (tuples become lists)"""
+    return json.loads(json.dumps(params))
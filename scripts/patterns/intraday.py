@@ -0,0 +1,148 @@
+"""
+Streaming minute-bar analysis
+
+Minute files are read in fixed-size chunks and regrouped into one symbol-day at
+a time, so memory holds a chunk plus one day whatever the file size. Each day
+is reduced to a single summary row - its daily OHLCV plus when the gap filled
+and when the day's low and high printed - and the daily event masks then run
+over a symbol's summary rows, giving the same gap/reversal counts as the daily
+analyzers with intraday timing on top.
+
+Files are <directory>/<symbol>.csv with a timestamp first column and
+Open/High/Low/Close/Volume, sorted by time (any bar interval).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from patterns.runner import merge_results
+from patterns.sources import OHLCV_COLUMNS
+from patterns.stats import OutcomeStats
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Per-day timing columns added to the daily summary
+# Fill_Minutes: minutes from the first bar to the first bar touching the previous close (NaN if no gap or unfilled)
+# Low_Time / High_Time: clock time of the day's low / high, in minutes after midnight
+TIMING_COLUMNS = ['Fill_Minutes', 'Low_Time', 'High_Time']
+
+
+def read_minute_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Bars of a minute file, `chunk_rows` at a time"""
+    for chunk in pd.read_csv(path, index_col=0, chunksize=chunk_rows):
+        chunk.index = pd.to_datetime(chunk.index)
+        yield chunk[OHLCV_COLUMNS]
+
+
+def symbol_days(chunks):
+    """(date, bars) per trading day; a day cut by a chunk boundary is stitched back together"""
+    pending = None
+    for chunk in chunks:
+        if pending is not None:
+            chunk = pd.concat([pending, chunk])
+        days = chunk.index.normalize()
+        # The chunk's last day may continue in the next chunk
+        complete = days != days[-1]
+        for date, bars in chunk[complete].groupby(days[complete]):
+            yield date, bars
+        pending = chunk[~complete]
+    if pending is not None and len(pending):
+        yield pending.index[0].normalize(), pending
+
+
+def summarize_day(bars, prev_close=np.nan):
+    """One day's bars reduced to daily OHLCV plus the TIMING_COLUMNS"""
+    high = bars['High'].to_numpy(dtype=np.float64)
+    low = bars['Low'].to_numpy(dtype=np.float64)
+    day_open = bars['Open'].iloc[0]
+    stamps = bars.index
+    minutes = (stamps - stamps[0]).total_seconds().to_numpy() / 60
+    clock = (stamps.hour * 60 + stamps.minute).to_numpy()
+
+    fill = np.nan
+    if day_open > prev_close:
+        touched = low <= prev_close
+    elif day_open < prev_close:
+        touched = high >= prev_close
+    else:
+        touched = None
+    if touched is not None and touched.any():
+        fill = minutes[touched.argmax()]
+
+    return {
+        'Open': day_open, 'High': np.nanmax(high), 'Low': np.nanmin(low),
+        'Close': bars['Close'].iloc[-1], 'Volume': bars['Volume'].sum(),
+        'Fill_Minutes': fill, 'Low_Time': clock[np.nanargmin(low)], 'High_Time': clock[np.nanargmax(high)],
+    }
+
+
+def daily_summaries(chunks):
+    """DataFrame of summarize_day rows, one per day - the only per-symbol state kept"""
+    rows = {}
+    prev_close = np.nan
+    for date, bars in symbol_days(chunks):
+        rows[date] = summarize_day(bars, prev_close)
+        prev_close = rows[date]['Close']
+    daily = pd.DataFrame.from_dict(rows, orient='index', columns=OHLCV_COLUMNS + TIMING_COLUMNS)
+    daily.index.name = 'Date'
+    return daily
+
+
+def minute_study(daily, events, start=1, stop=1, min_rows=10, require=('Gap', 'Intraday'), flags=None):
+    """
+    {event: {timing column: OutcomeStats, flag: count, 'total': count}} over
+    one symbol's daily summary (with derived columns). Days are eligible as in
+    event_study - [start, n - stop) of the n days, none if n < min_rows, and
+    only where every `require` column is known - so pass a daily study's
+    bounds to count the same events. Timing stats skip days where the timing
+    is NaN, e.g. gaps that never filled.
+    """
+    flags = flags or {}
+    n = len(daily)
+    position = np.arange(n)
+    eligible = (position >= start) & (position < n - stop) & (n >= min_rows)
+    for name in require:
+        eligible &= daily[name].notna().to_numpy()
+    flagged = {name: np.asarray(fn(daily), dtype=bool) for name, fn in flags.items()}
+
+    results = {}
+    for event in events:
+        mask = np.asarray(event.mask(daily), dtype=bool) & eligible
+        outcome = {'total': int(mask.sum())}
+        for name in TIMING_COLUMNS:
+            values = daily[name].to_numpy(dtype=np.float64)[mask]
+            outcome[name] = OutcomeStats()
+            outcome[name].add_array(values[~np.isnan(values)])
+        for name, values in flagged.items():
+            outcome[name] = int(values[mask].sum())
+        results[event.name] = outcome
+    return results
+
+
+def analyze_minute_file(path, symbol, study, derive, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """study(derive(daily summary, symbol)) for one symbol's minute file"""
+    daily = daily_summaries(read_minute_chunks(path, chunk_rows))
+    return study(derive(daily, symbol))
+
+
+def run_intraday(directory, symbols, study, derive, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1):
+    """
+    Stream every symbol's minute file through `study` and merge the results.
+
+    study and derive must be module-level functions when workers > 1, since
+    they are sent to worker processes. Returns (merged results, symbols used).
+    """
+    found = [symbol for symbol in symbols if os.path.exists(os.path.join(directory, f"{symbol}.csv"))]
+    paths = [os.path.join(directory, f"{symbol}.csv") for symbol in found]
+    n = len(found)
+    if workers == 1 or n <= 1:
+        parts = [analyze_minute_file(path, symbol, study, derive, chunk_rows)
+                 for path, symbol in zip(paths, found)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, n)) as pool:
+            parts = list(pool.map(analyze_minute_file, paths, found, [study] * n, [derive] * n,
+                                  [chunk_rows] * n))
+    return (merge_results(parts) if parts else {}), found
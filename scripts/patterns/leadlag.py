@@ -0,0 +1,105 @@
+"""
+Sector lead-lag matrix
+
+The conditional return of each sector L days after another sector's big move
+is a matrix product: trigger days (dates x sectors, 0/1) transposed times the
+lagged returns (dates x sectors). Stacking every direction/threshold and every
+lag side by side turns the whole table into a single product.
+"""
+
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+DIRECTIONS = ('up', 'down')
+
+# Arrays are indexed [direction, threshold, lag, leader, follower]; events is
+# [direction, threshold, leader] - the number of big-move days of the leader
+LeadLag = namedtuple('LeadLag', ['sectors', 'thresholds', 'lags', 'events', 'count', 'mean', 'hit_rate'])
+
+
+def lagged_returns(returns, lag):
+    """
+    Each sector's return `lag` observations later, aligned to today's row.
+
+    Steps over rows where the sector has no data, like indexing its own
+    dropna()'d series; rows where the sector itself has no data are NaN.
+    """
+    values = returns.to_numpy()
+    lagged = np.full(values.shape, np.nan)
+    for k in range(values.shape[1]):
+        rows = np.flatnonzero(~np.isnan(values[:, k]))
+        if len(rows) > lag:
+            lagged[rows[:-lag], k] = values[rows[lag:], k]
+    return lagged
+
+
+def lead_lag_matrix(returns, thresholds=(2,), lags=(1, 2, 3, 4, 5)):
+    """
+    Conditional follower returns after leader moves beyond +/-threshold %.
+
+    returns is a (dates x sectors) DataFrame of daily % returns (NaN = no data).
+    """
+    values = returns.to_numpy()
+    n_sectors = values.shape[1]
+
+    # Trigger columns ordered (direction, threshold, leader); follower columns (lag, follower)
+    with np.errstate(invalid='ignore'):
+        triggers = np.concatenate([values > t if direction == 'up' else values < -t
+                                   for direction in DIRECTIONS for t in thresholds], axis=1)
+    follow = np.concatenate([lagged_returns(returns, lag) for lag in lags], axis=1)
+    valid = ~np.isnan(follow)
+
+    # One pass over the dates for every (direction, threshold, lag, leader, follower) cell
+    trigger = triggers.astype(np.float64).T
+    count = np.rint(trigger @ valid.astype(np.float64)).astype(np.int64)
+    total = trigger @ np.where(valid, follow, 0.0)
+    positive = trigger @ (follow > 0).astype(np.float64)
+
+    # (direction, threshold, leader, lag, follower) -> (direction, threshold, lag, leader, follower)
+    shape = (len(DIRECTIONS), len(thresholds), n_sectors, len(lags), n_sectors)
+    count, total, positive = (a.reshape(shape).transpose(0, 1, 3, 2, 4) for a in (count, total, positive))
+    events = triggers.sum(axis=0).reshape(shape[:3])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, total / count, np.nan)
+        hit_rate = np.where(count > 0, positive / count * 100, np.nan)
+    return LeadLag(list(returns.columns), list(thresholds), list(lags), events, count, mean, hit_rate)
+
+
+def to_json_dict(result):
+    """Compact, versioned JSON-ready form of a LeadLag for the dashboard"""
+    def rounded(values, digits):
+        return np.where(np.isnan(values), None, np.round(values, digits)).tolist()
+
+    return {
+        'version': 1,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'sectors': result.sectors,
+        'directions': list(DIRECTIONS),
+        'thresholds': result.thresholds,
+        'lags': result.lags,
+        'layout': {
+            'events': '[direction][threshold][leader]',
+            'count/mean/hit_rate': '[direction][threshold][lag][leader][follower]',
+        },
+        'events': result.events.tolist(),
+        'count': result.count.tolist(),
+        'mean': rounded(result.mean, 3),
+        'hit_rate': rounded(result.hit_rate, 1),
+    }
+
+
+def write_json(result, path):
+    """Write the matrix atomically, so a reader never sees a half-written file"""
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(to_json_dict(result), f, separators=(',', ':'))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
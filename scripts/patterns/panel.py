@@ -0,0 +1,182 @@
+"""
+Date x symbol panel of the whole universe
+
+Every field (OHLCV plus the derived Returns/Gap/Intraday/Volume_Ratio) is one
+aligned (dates, symbols) matrix. Matrices are Fortran-ordered, which is the
+layout pandas uses for a single-dtype DataFrame, so panel.frame(field) wraps
+the array without copying and each symbol's column is contiguous.
+"""
+
+import numpy as np
+import pandas as pd
+
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Returns', 'Gap', 'Intraday', 'Volume_Ratio']
+
+
+class Panel:
+    """
+    Aligned field matrices plus where each symbol's own history starts and ends.
+
+    Rows before first[j] / after last[j] are NaN padding, and so are dates
+    inside a symbol's history it has no bar for; bars[i, j] tells a bar from
+    padding. Bar positions used by the analyzers (e.g. "skip the first 20
+    bars") count the symbol's own bars, `offset[j]` of which lie before the
+    panel's first row.
+    """
+
+    def __init__(self, dates, symbols, fields, first, last, bars=None, offset=None):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.fields = fields
+        self.first = first
+        self.last = last
+        if bars is None:
+            rows = np.arange(len(dates))[:, None]
+            bars = (rows >= first[None, :]) & (rows <= last[None, :])
+        self.bars = bars
+        self.offset = np.maximum(-first, 0) if offset is None else offset
+
+    @classmethod
+    def from_frames(cls, all_data, fields=PANEL_FIELDS, dtype=np.float64):
+        """Build a panel from per-symbol frames (as returned by fetch_stock_data)"""
+        frames = {symbol: df for symbol, df in all_data.items() if df is not None and len(df) > 0}
+        symbols = list(frames)
+        indexes = [pd.DatetimeIndex(df.index) for df in frames.values()]
+        tz = indexes[0].tz if indexes else None
+        stamps = [_stamps(index, tz) for index in indexes]
+        unique = np.unique(np.concatenate(stamps)) if stamps else np.array([], dtype=np.int64)
+        dates = pd.DatetimeIndex(unique.astype('datetime64[ns]'), name='Date')
+        if tz is not None:
+            dates = dates.tz_localize('UTC').tz_convert(tz)
+
+        # Every field gets a matrix, so an empty universe is an empty panel rather than missing fields
+        arrays = {name: np.full((len(dates), len(symbols)), np.nan, dtype=dtype, order='F') for name in fields}
+        bars = np.zeros((len(dates), len(symbols)), dtype=bool, order='F')
+        first = np.zeros(len(symbols), dtype=np.int64)
+        last = np.zeros(len(symbols), dtype=np.int64)
+        for j, (df, rows) in enumerate(zip(frames.values(), stamps)):
+            rows = np.searchsorted(unique, rows)
+            first[j], last[j] = rows[0], rows[-1]
+            bars[rows, j] = True
+            for name in fields:
+                if name in df.columns:
+                    arrays[name][rows, j] = df[name].to_numpy(dtype=dtype)
+        return cls(dates, symbols, arrays, first, last, bars)
+
+    @property
+    def lengths(self):
+        """Number of bars in each symbol's own history"""
+        return self.offset + self.bars.sum(axis=0)
+
+    def has_gaps(self):
+        """Whether any symbol lacks a bar on a date inside its history in the panel"""
+        if not self.bars.size:
+            return False
+        counts = self.bars.sum(axis=0)
+        n = len(self.dates)
+        top = np.argmax(self.bars, axis=0)
+        bottom = n - 1 - np.argmax(self.bars[::-1], axis=0)
+        return bool(np.any((counts > 0) & (counts < bottom - top + 1)))
+
+    def compact(self):
+        """
+        (fields, rows): the field matrices with each symbol's own bars packed
+        into consecutive rows, and the (bars x symbols) panel row each packed
+        bar came from (-1 once a symbol's bars run out). Shifts and rolling
+        windows over the packed matrices step over dates a symbol has no bar
+        on. A panel without such gaps is returned in its own layout, with
+        rows the identity.
+        """
+        n = len(self.dates)
+        if not self.has_gaps():
+            return self.fields, np.where(self.bars, np.arange(n)[:, None], -1)
+        counts = self.bars.sum(axis=0)
+        rows = np.full((int(counts.max()), len(self.symbols)), -1, dtype=np.int64, order='F')
+        packed, symbols = np.nonzero(self.bars)
+        rows[(np.cumsum(self.bars, axis=0) - 1)[packed, symbols], symbols] = packed
+        valid = rows >= 0
+        source = np.where(valid, rows, 0)
+        columns = np.arange(len(self.symbols))[None, :]
+        fields = {name: np.asfortranarray(np.where(valid, values[source, columns], np.nan))
+                  for name, values in self.fields.items()}
+        return fields, rows
+
+    def frame(self, field):
+        """A field as a (dates x symbols) DataFrame sharing the panel's memory"""
+        return pd.DataFrame(self.fields[field], index=self.dates, columns=self.symbols, copy=False)
+
+    def frames(self):
+        """Every field as a DataFrame view, keyed by field name"""
+        return {name: self.frame(name) for name in self.fields}
+
+    def column(self, field, symbol):
+        """One symbol's bars of a field"""
+        j = self.symbols.index(symbol)
+        return self.fields[field][self.bars[:, j], j]
+
+    def positions(self):
+        """(dates x symbols) bar number within each symbol's own history (-1 on padding)"""
+        return np.where(self.bars, np.cumsum(self.bars, axis=0) - 1 + self.offset[None, :], -1)
+
+    def select(self, symbols):
+        """Panel restricted to `symbols` (in that order)"""
+        cols = [self.symbols.index(symbol) for symbol in symbols]
+        fields = {name: np.asfortranarray(values[:, cols]) for name, values in self.fields.items()}
+        return Panel(self.dates, symbols, fields, self.first[cols], self.last[cols],
+                     np.asfortranarray(self.bars[:, cols]), self.offset[cols])
+
+    def tail(self, start_row):
+        """
+        Panel from `start_row` on. Bar positions keep counting from each symbol's
+        real first bar (offset holds the bars cut off), so first/last may point
+        before the slice.
+        """
+        fields = {name: np.asfortranarray(values[start_row:]) for name, values in self.fields.items()}
+        return Panel(self.dates[start_row:], self.symbols, fields, self.first - start_row, self.last - start_row,
+                     np.asfortranarray(self.bars[start_row:]), self.offset + self.bars[:start_row].sum(axis=0))
+
+    def sector_matrix(self, sector_map, min_members=2):
+        """
+        (sectors, membership) where membership is a (symbols x sectors) 0/1 matrix.
+
+        Sectors with fewer than `min_members` symbols in the panel are left out.
+        """
+        position = {symbol: j for j, symbol in enumerate(self.symbols)}
+        sectors = []
+        columns = []
+        for sector, members in sector_map.items():
+            found = [position[symbol] for symbol in members if symbol in position]
+            if len(found) < min_members:
+                continue
+            column = np.zeros(len(self.symbols))
+            column[found] = 1
+            sectors.append(sector)
+            columns.append(column)
+        membership = np.column_stack(columns) if columns else np.zeros((len(self.symbols), 0))
+        return sectors, membership
+
+    def sector_means(self, field, sector_map, min_members=2):
+        """(dates x sectors) equal-weight mean of a field over each sector's symbols, ignoring NaNs"""
+        sectors, membership = self.sector_matrix(sector_map, min_members)
+        values = self.fields[field]
+        valid = ~np.isnan(values)
+        totals = np.where(valid, values, 0) @ membership
+        counts = valid.astype(values.dtype) @ membership
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts > 0, totals / counts, np.nan)
+        return pd.DataFrame(means, index=self.dates, columns=sectors)
+
+
+def as_panel(data):
+    """Accept either a Panel or a dict of per-symbol frames"""
+    return data if isinstance(data, Panel) else Panel.from_frames(data)
+
+
+def _stamps(index, tz):
+    """int64 nanosecond stamps of an index, in UTC when the panel is tz-aware"""
+    if tz is not None:
+        index = index.tz_convert('UTC') if index.tz is not None else index.tz_localize(tz).tz_convert('UTC')
+        index = index.tz_localize(None)
+    elif index.tz is not None:
+        index = index.tz_localize(None)
+    return index.as_unit('ns').asi8
@@ -0,0 +1,129 @@
+"""
+Per-stage instrumentation for --profile
+
+A Profiler records, for every stage it wraps (a symbol's download, its derived
+columns, the panel build, one analyzer over one shard, ...), the wall time,
+the CPU time of the running thread, the rows processed and the process's peak
+RSS when the stage ended. A disabled Profiler's stages cost nothing, so code
+can wrap stages unconditionally.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class Stage:
+    """One timed stage; `rows` may be set inside the `with` block once known"""
+
+    __slots__ = ('name', 'symbol', 'rows', 'wall', 'cpu', 'peak_rss_mb')
+
+    def __init__(self, name, symbol=None, rows=0):
+        self.name = name
+        self.symbol = symbol
+        self.rows = rows
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_rss_mb = None
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+class Profiler:
+    """Collects Stage records from any thread"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, symbol=None, rows=0):
+        stage = Stage(name, symbol, rows)
+        if not self.enabled:
+            yield stage
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield stage
+        finally:
+            stage.wall = time.perf_counter() - wall
+            stage.cpu = time.thread_time() - cpu
+            stage.peak_rss_mb = peak_rss_mb()
+            with self._lock:
+                self.stages.append(stage)
+
+    def extend(self, stages):
+        """Add stages recorded elsewhere, e.g. by a worker process"""
+        with self._lock:
+            self.stages.extend(stages)
+
+    def table(self):
+        """Every stage as a DataFrame row"""
+        return pd.DataFrame([{slot: getattr(stage, slot) for slot in Stage.__slots__}
+                             for stage in self.stages],
+                            columns=list(Stage.__slots__))
+
+    def summary(self):
+        """Totals per stage name, slowest first"""
+        table = self.table()
+        if table.empty:
+            return table
+        summary = table.groupby('name', sort=False).agg(
+            calls=('wall', 'size'), wall=('wall', 'sum'), cpu=('cpu', 'sum'),
+            rows=('rows', 'sum'), peak_rss_mb=('peak_rss_mb', 'max'))
+        summary['rows_per_sec'] = (summary['rows'] / summary['wall']).where(summary['wall'] > 0)
+        return summary.sort_values('wall', ascending=False)
+
+    def offenders(self, top=10):
+        """The `top` slowest individual stages"""
+        table = self.table()
+        return table.sort_values('wall', ascending=False).head(top)
+
+    def hottest(self, prefix):
+        """Name (without `prefix`) of the stage family under `prefix` with the most total wall time"""
+        totals = {}
+        for stage in self.stages:
+            if stage.name.startswith(prefix):
+                totals[stage.name[len(prefix):]] = totals.get(stage.name[len(prefix):], 0.0) + stage.wall
+        return max(totals, key=totals.get) if totals else None
+
+
+def profile_call(fn, path=None, top=15):
+    """
+    Run fn() under cProfile; dump the stats to `path` (readable with pstats or
+    snakeviz) when given. Returns (fn's result, text of the `top` entries by
+    cumulative time).
+    """
+    profile = cProfile.Profile()
+    result = profile.runcall(fn)
+    if path:
+        profile.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(top)
+    return result, out.getvalue()
@@ -0,0 +1,163 @@
+"""
+Flat result records and the artifact writer
+
+Analyzer results (nested dicts of OutcomeStats, or a LeadLag) flatten into
+three kinds of fixed-field records - the form the report renderers read and
+the dashboard artifact stores:
+
+PatternRecord  one outcome of one pattern (event count, outcome count, mean,
+               std, hit rate)
+FlagRecord     how many of a pattern's events had a flag set (e.g. gap filled)
+LeadLagRecord  one cell of the sector lead-lag matrix
+"""
+
+import json
+import math
+import os
+from collections import namedtuple
+from datetime import datetime
+
+from patterns.leadlag import DIRECTIONS, LeadLag
+from patterns.stats import OutcomeStats
+
+RECORDS_VERSION = 1
+
+# analyzer/group/pattern/outcome: str; events/count: int; mean/std/hit_rate: float (NaN if undefined).
+# group is the results sub-dict the pattern came from ('' at the top level)
+PatternRecord = namedtuple('PatternRecord', ['analyzer', 'group', 'pattern', 'outcome', 'events',
+                                             'count', 'mean', 'std', 'hit_rate'])
+
+# flag: str; events/count: int
+FlagRecord = namedtuple('FlagRecord', ['analyzer', 'group', 'pattern', 'flag', 'events', 'count'])
+
+# direction/leader/follower: str; threshold: float; lag/leader_events/count: int; mean/hit_rate: float
+LeadLagRecord = namedtuple('LeadLagRecord', ['analyzer', 'direction', 'threshold', 'lag', 'leader', 'follower',
+                                             'leader_events', 'count', 'mean', 'hit_rate'])
+
+RECORD_TABLES = {'patterns': PatternRecord, 'flags': FlagRecord, 'lead_lag': LeadLagRecord}
+
+
+def to_records(analyzer, results):
+    """Records of one analyzer's results, in the results' own order"""
+    if isinstance(results, LeadLag):
+        return _lead_lag_records(analyzer, results)
+    return _pattern_records(analyzer, '', results)
+
+
+def _pattern_records(analyzer, group, results):
+    records = []
+    for pattern, data in results.items():
+        if 'total' not in data:
+            # A sub-dict of patterns, e.g. the streak analyzer's 'streaks' / 'by_move'
+            records += _pattern_records(analyzer, f"{group}/{pattern}" if group else pattern, data)
+            continue
+        events = data['total']
+        for name, value in data.items():
+            if isinstance(value, OutcomeStats):
+                std = value.std if value.valid > 1 else math.nan
+                records.append(PatternRecord(analyzer, group, pattern, name, events, value.count,
+                                             value.mean, std, value.positive_rate))
+            elif name != 'total':
+                records.append(FlagRecord(analyzer, group, pattern, name, events, value))
+    return records
+
+
+def _lead_lag_records(analyzer, result):
+    records = []
+    for d, direction in enumerate(DIRECTIONS):
+        for t, threshold in enumerate(result.thresholds):
+            for l, lag in enumerate(result.lags):
+                for i, leader in enumerate(result.sectors):
+                    for j, follower in enumerate(result.sectors):
+                        records.append(LeadLagRecord(
+                            analyzer, direction, threshold, lag, leader, follower,
+                            int(result.events[d, t, i]), int(result.count[d, t, l, i, j]),
+                            float(result.mean[d, t, l, i, j]), float(result.hit_rate[d, t, l, i, j])))
+    return records
+
+
+def by_pattern(records, group=''):
+    """
+    {pattern: {'total': events, outcome: PatternRecord, flag: count}} for the
+    records of one group - the shape the report renderers walk
+    """
+    patterns = {}
+    for record in records:
+        if isinstance(record, LeadLagRecord) or record.group != group:
+            continue
+        data = patterns.setdefault(record.pattern, {'total': record.events})
+        if isinstance(record, PatternRecord):
+            data[record.outcome] = record
+        else:
+            data[record.flag] = record.count
+    return patterns
+
+
+def records_tables(records):
+    """{table name: list of records} split by record type"""
+    tables = {name: [] for name in RECORD_TABLES}
+    kinds = {kind: name for name, kind in RECORD_TABLES.items()}
+    for record in records:
+        tables[kinds[type(record)]].append(record)
+    return tables
+
+
+def to_json_dict(records, meta=None):
+    """Versioned, column-oriented JSON form of the records (NaN becomes null)"""
+    tables = records_tables(records)
+    return {
+        'version': RECORDS_VERSION,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'meta': meta or {},
+        'tables': {name: {'columns': list(RECORD_TABLES[name]._fields),
+                          'rows': [[_json_value(value) for value in record] for record in rows]}
+                   for name, rows in tables.items()},
+    }
+
+
+def write_records(records, path, meta=None):
+    """
+    Write the records as a JSON artifact, or, for a .parquet path, one Parquet
+    file per table next to it (<name>.patterns.parquet, ...; needs pyarrow).
+    Writes are atomic so a server never reads a half-written artifact.
+    Returns the paths written.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if not path.endswith('.parquet'):
+        _replace(path, lambda tmp: _dump_json(to_json_dict(records, meta), tmp))
+        return [path]
+
+    import pandas as pd
+
+    stem = path[:-len('.parquet')]
+    written = []
+    for name, rows in records_tables(records).items():
+        table_path = f"{stem}.{name}.parquet"
+        frame = pd.DataFrame(rows, columns=RECORD_TABLES[name]._fields)
+        try:
+            _replace(table_path, lambda tmp: frame.to_parquet(tmp, index=False))
+        except ImportError as e:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from e
+        written.append(table_path)
+    return written
+
+
+def _dump_json(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+
+
+def _replace(path, write):
+    tmp = f"{path}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _json_value(value):
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, 4)
+    return value
@@ -0,0 +1,115 @@
+"""
+Parallel runner for the pattern analyzers
+
+The panel is cut into fixed-size shards of consecutive symbols. Each shard
+builds one FeatureSet (rolling windows, streaks, forward returns) that all
+per-symbol analyzers share, and the shards' partial results are merged back in
+symbol order. Shards are the same whatever the worker count, so a parallel run
+produces exactly the statistics of a serial one.
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from patterns.events import FeatureSet
+from patterns.profiling import Profiler
+from patterns.records import to_records
+from patterns.stats import OutcomeStats
+
+# collect(data, **kwargs) -> partial results, report(records) prints them.
+# Cross-sectional analyzers (e.g. sector averages) need every symbol at once
+# and run on the full panel in the parent process.
+Analyzer = namedtuple('Analyzer', ['name', 'collect', 'report', 'kwargs', 'cross_sectional'],
+                      defaults=[None, False])
+
+DEFAULT_SHARD_SIZE = 25
+
+
+def merge_results(parts):
+    """Combine partial results: accumulators merge, counts add, dicts merge key by key"""
+    first = parts[0]
+    if isinstance(first, dict):
+        return {key: merge_results([part[key] for part in parts]) for key in first}
+    if isinstance(first, OutcomeStats):
+        return OutcomeStats.merged(parts)
+    if isinstance(first, list):
+        return [value for part in parts for value in part]
+    return sum(parts)
+
+
+def collect_shard(panel, analyzers, profiler=None):
+    """
+    Run every per-symbol analyzer over one shard with a shared FeatureSet.
+
+    With a profiler each analyzer is an 'analyze:<name>' stage labelled with
+    the shard's symbol range; features are built inside the first analyzer
+    that needs them, so its time includes theirs.
+    """
+    profiler = profiler or Profiler(enabled=False)
+    features = FeatureSet(panel, profiler=profiler)
+    label = f"{panel.symbols[0]}..{panel.symbols[-1]}" if panel.symbols else None
+    rows = int(panel.lengths.sum())
+    results = {}
+    for analyzer in analyzers:
+        with profiler.stage(f'analyze:{analyzer.name}', label, rows):
+            results[analyzer.name] = analyzer.collect(features, **(analyzer.kwargs or {}))
+    return results
+
+
+def _profiled_shard(panel, analyzers):
+    """collect_shard in a worker process, returning its stages along with the results"""
+    profiler = Profiler()
+    return collect_shard(panel, analyzers, profiler), profiler.stages
+
+
+def shard_panel(panel, shard_size=DEFAULT_SHARD_SIZE):
+    symbols = panel.symbols
+    return [panel.select(symbols[i:i + shard_size]) for i in range(0, len(symbols), shard_size)]
+
+
+def run_analyzers(panel, analyzers, workers=None, shard_size=DEFAULT_SHARD_SIZE, profiler=None):
+    """
+    Collect every analyzer's results over the panel.
+
+    workers=None uses every CPU core; workers=1 runs the shards in-process.
+    Stages timed in worker processes are sent back to `profiler`.
+    Returns {analyzer name: merged results}.
+    """
+    workers = workers or os.cpu_count() or 1
+    profiler = profiler or Profiler(enabled=False)
+    per_symbol = [analyzer for analyzer in analyzers if not analyzer.cross_sectional]
+    shards = shard_panel(panel, shard_size)
+
+    if workers == 1 or len(shards) <= 1:
+        partials = [collect_shard(shard, per_symbol, profiler) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            if profiler.enabled:
+                partials = []
+                for partial, stages in pool.map(_profiled_shard, shards, [per_symbol] * len(shards)):
+                    partials.append(partial)
+                    profiler.extend(stages)
+            else:
+                partials = list(pool.map(collect_shard, shards, [per_symbol] * len(shards)))
+
+    results = {}
+    for analyzer in analyzers:
+        if analyzer.cross_sectional:
+            with profiler.stage(f'analyze:{analyzer.name}', rows=int(panel.lengths.sum())):
+                results[analyzer.name] = analyzer.collect(panel, **(analyzer.kwargs or {}))
+        elif partials:
+            results[analyzer.name] = merge_results([partial[analyzer.name] for partial in partials])
+    return results
+
+
+def results_records(analyzers, results):
+    """Every analyzer's results as flat records, in the order the analyzers were given"""
+    return [record for analyzer in analyzers if analyzer.name in results
+            for record in to_records(analyzer.name, results[analyzer.name])]
+
+
+def report_results(analyzers, records):
+    """Render each analyzer's records in the order the analyzers were given"""
+    for analyzer in analyzers:
+        analyzer.report([record for record in records if record.analyzer == analyzer.name])
@@ -0,0 +1,154 @@
+"""
+Calendar-month seasonality
+
+Daily bars are reduced to one bar per symbol and calendar month - first open,
+highest high, lowest low, last close, total volume - with one groupby per field
+over the whole (dates x symbols) panel. The monthly return is open-to-close, as
+in lib/month-analysis.ts, and months with fewer than `min_days` trading days
+are dropped. Sector returns are the equal-weight mean of their members' monthly
+returns (one matrix product), and the per-calendar-month count, average and
+win rate of every symbol and sector are grouped reductions of those matrices.
+"""
+
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+MONTHS = list(range(1, 13))
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# History the month-analysis API analyzes live (LIVE_PERIOD in its route); it
+# ranks artifact and live stocks together, so only serves artifacts of this period
+ARTIFACT_PERIOD = '2y'
+
+# (year-month x symbols) DataFrames; returns is NaN for months with too few trading days
+MonthlyBars = namedtuple('MonthlyBars', ['open', 'high', 'low', 'close', 'volume', 'days', 'returns'])
+
+# (calendar month 1-12 x names) DataFrames: months with a return, their mean %, % of them positive
+MonthStats = namedtuple('MonthStats', ['count', 'mean', 'win_rate'])
+
+Seasonality = namedtuple('Seasonality', ['bars', 'symbols', 'sectors', 'members'])
+
+
+def monthly_bars(panel, min_days=10):
+    """MonthlyBars of every symbol of a panel"""
+    dates = panel.dates.tz_localize(None) if panel.dates.tz is not None else panel.dates
+    key = dates.to_period('M')
+    close = panel.frame('Close').groupby(key)
+    bars = {
+        'open': panel.frame('Open').groupby(key).first(),
+        'high': panel.frame('High').groupby(key).max(),
+        'low': panel.frame('Low').groupby(key).min(),
+        'close': close.last(),
+        'volume': panel.frame('Volume').groupby(key).sum(min_count=1),
+        'days': close.count(),
+    }
+    returns = (bars['close'] - bars['open']) / bars['open'] * 100
+    return MonthlyBars(**bars, returns=returns.where(bars['days'] >= min_days))
+
+
+def sector_returns(returns, sectors, membership):
+    """
+    (year-month x sectors) equal-weight mean of the members' monthly returns,
+    ignoring missing members; membership is Panel.sector_matrix's (symbols x sectors) 0/1 matrix
+    """
+    values = returns.to_numpy()
+    valid = ~np.isnan(values)
+    totals = np.where(valid, values, 0) @ membership
+    counts = valid.astype(np.float64) @ membership
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, totals / counts, np.nan)
+    return pd.DataFrame(means, index=returns.index, columns=sectors)
+
+
+def month_stats(returns):
+    """MonthStats of (year-month x names) returns, by calendar month"""
+    calendar = returns.index.month
+    valid = returns.notna()
+    positive = (returns > 0).astype(np.float64).where(valid)
+    return MonthStats(
+        valid.groupby(calendar).sum().reindex(MONTHS, fill_value=0).astype(np.int64),
+        returns.groupby(calendar).mean().reindex(MONTHS),
+        (positive.groupby(calendar).mean() * 100).reindex(MONTHS),
+    )
+
+
+def seasonality(panel, sector_map, min_days=10, min_members=2):
+    """Seasonality of every symbol of a panel and every sector of sector_map with `min_members` in it"""
+    bars = monthly_bars(panel, min_days)
+    sectors = sector_returns(bars.returns, *panel.sector_matrix(sector_map, min_members))
+    members = {sector: [symbol for symbol in sector_map[sector] if symbol in bars.returns.columns]
+               for sector in sectors.columns}
+    return Seasonality(bars, month_stats(bars.returns), month_stats(sectors), members)
+
+
+def best_worst(stats, name):
+    """(best, worst) calendar month of a name by average return, or (None, None) without data"""
+    mean = stats.mean[name].dropna()
+    if mean.empty:
+        return None, None
+    return int(mean.idxmax()), int(mean.idxmin())
+
+
+def to_json_dict(result, min_months=12, meta=None):
+    """
+    Versioned JSON-ready form for the month-analysis API. Symbols with fewer
+    than `min_months` monthly returns are left out, like analyzeStockPattern;
+    `universe` lists every symbol analyzed, so the API knows which stocks the
+    artifact covers and analyzes the others live. Per-name arrays are indexed
+    by calendar month - 1.
+    """
+    def rounded(values, digits):
+        values = np.asarray(values, dtype=np.float64)
+        return np.where(np.isnan(values), None, np.round(values, digits)).tolist()
+
+    def month_fields(stats, name):
+        best, worst = best_worst(stats, name)
+        return {'count': stats.count[name].tolist(), 'mean': rounded(stats.mean[name], 3),
+                'win_rate': rounded(stats.win_rate[name], 1), 'best': best, 'worst': worst}
+
+    bars = result.bars
+    symbols = {}
+    for symbol in bars.returns.columns:
+        valid = bars.returns[symbol].notna().to_numpy()
+        if valid.sum() < min_months:
+            continue
+        months = bars.returns.index[valid]
+        prices = np.round(np.column_stack([getattr(bars, field)[symbol].to_numpy()[valid]
+                                           for field in ('open', 'close', 'high', 'low')]), 2)
+        returns = np.round(bars.returns[symbol].to_numpy()[valid], 3)
+        volume = bars.volume[symbol].to_numpy()[valid].astype(np.int64)
+        symbols[symbol] = dict(
+            month_fields(result.symbols, symbol),
+            last_close=round(float(bars.close[symbol].dropna().iloc[-1]), 2),
+            monthly=[[year, month, *row, ret, vol] for year, month, row, ret, vol in
+                     zip(months.year.tolist(), months.month.tolist(), prices.tolist(),
+                         returns.tolist(), volume.tolist())])
+
+    return {
+        'version': 1,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'meta': meta or {},
+        'universe': list(bars.returns.columns),
+        'months': MONTH_NAMES,
+        'layout': {
+            'count/mean/win_rate': '[calendar month - 1]',
+            'monthly': '[year, month, open, close, high, low, return %, volume]',
+        },
+        'symbols': symbols,
+        'sectors': {sector: dict(month_fields(result.sectors, sector), members=members)
+                    for sector, members in result.members.items()},
+    }
+
+
+def write_json(result, path, min_months=12, meta=None):
+    """Write the artifact atomically, so a server never reads a half-written file"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(to_json_dict(result, min_months, meta), f, separators=(',', ':'))
+    os.replace(tmp, path)
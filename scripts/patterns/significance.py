@@ -0,0 +1,132 @@
+"""
+Bootstrap and permutation significance of every pattern
+
+For each (analyzer, event, outcome) the raw event outcomes are resampled in
+batched (resamples x events) index matrices:
+
+- bootstrap: events drawn with replacement give a percentile CI of the mean;
+- permutation: each event is replaced by a random eligible day of the same
+  symbol (with replacement), giving the null distribution of the mean when
+  the pattern carries no information beyond which symbols it picks.
+
+The two-sided p-values are then corrected across all patterns (Benjamini-
+Hochberg or Holm).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from patterns.events import FeatureSet
+
+CORRECTIONS = ('bh', 'holm')
+
+SIGNIFICANCE_COLUMNS = ['analyzer', 'pattern', 'outcome', 'count', 'mean', 'baseline',
+                        'ci_low', 'ci_high', 'p_value', 'p_adjusted', 'significant']
+
+# Cap on the (resamples x events) cells drawn at once, to bound memory
+MAX_CELLS = 1 << 22
+
+
+def collect_samples(panel, analyzers):
+    """{(analyzer, event, outcome): EventSample} for every per-symbol analyzer"""
+    features = FeatureSet(panel)
+    samples = {}
+    for analyzer in analyzers:
+        if analyzer.cross_sectional:
+            continue
+        features.samples = {}
+        analyzer.collect(features, **(analyzer.kwargs or {}))
+        for (event, outcome), sample in features.samples.items():
+            samples[(analyzer.name, event, outcome)] = sample
+    features.samples = None
+    return samples
+
+
+def test_sample(sample, resamples=2000, confidence=0.95, seed=0):
+    """
+    (mean, baseline, ci_low, ci_high, p_value) of one EventSample.
+
+    baseline is the mean expected under the null: each event's symbol's
+    average eligible-day outcome, averaged over the events.
+    """
+    rng = np.random.default_rng(seed)
+    symbols, values, pool = sample.symbols, sample.values, sample.pool
+    n = len(values)
+    observed = values.mean()
+    baseline = pool.means[symbols].mean()
+    start = pool.offsets[symbols]
+    size = pool.offsets[symbols + 1] - start
+
+    boot = np.empty(resamples)
+    null = np.empty(resamples)
+    step = max(1, MAX_CELLS // n)
+    for lo in range(0, resamples, step):
+        k = min(step, resamples - lo)
+        boot[lo:lo + k] = values[rng.integers(0, n, (k, n))].mean(axis=1)
+        draws = start + (rng.random((k, n)) * size).astype(np.int64)
+        null[lo:lo + k] = pool.values[draws].mean(axis=1)
+
+    ci_low, ci_high = np.quantile(boot, [(1 - confidence) / 2, (1 + confidence) / 2])
+    extreme = np.abs(null - baseline) >= abs(observed - baseline)
+    p_value = (1 + int(extreme.sum())) / (resamples + 1)
+    return observed, baseline, ci_low, ci_high, p_value
+
+
+def _test_group(group, resamples, confidence):
+    """Test samples sharing one pool (sent to a worker together so the pool is pickled once)"""
+    return [(key, test_sample(sample, resamples, confidence, seed)) for key, sample, seed in group]
+
+
+def adjust_pvalues(p_values, method='bh'):
+    """Benjamini-Hochberg (false discovery rate) or Holm (family-wise) adjusted p-values"""
+    p = np.asarray(p_values, dtype=np.float64)
+    m = len(p)
+    if m == 0:
+        return p
+    order = np.argsort(p, kind='stable')
+    ranked = p[order]
+    if method == 'holm':
+        adjusted = np.maximum.accumulate((m - np.arange(m)) * ranked)
+    elif method == 'bh':
+        adjusted = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError(f"Unknown correction: {method}")
+    result = np.empty(m)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+
+def run_significance(samples, resamples=2000, confidence=0.95, seed=0, workers=1,
+                     correction='bh', alpha=0.05, min_count=2):
+    """
+    Tidy DataFrame of significance results, one row per (analyzer, pattern, outcome)
+    with at least `min_count` events.
+
+    Every sample gets its own seed derived from `seed` and its position, so
+    results do not depend on the worker count.
+    """
+    keys = [key for key, sample in samples.items() if len(sample.values) >= max(min_count, 1)]
+    groups = {}
+    for i, key in enumerate(keys):
+        sample = samples[key]
+        groups.setdefault(id(sample.pool), []).append((key, sample, [seed, i]))
+    groups = list(groups.values())
+
+    if workers == 1 or len(groups) <= 1:
+        tested = [_test_group(group, resamples, confidence) for group in groups]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(groups))) as pool:
+            tested = list(pool.map(_test_group, groups, [resamples] * len(groups),
+                                   [confidence] * len(groups)))
+    found = dict(item for group in tested for item in group)
+
+    rows = []
+    for key in keys:
+        mean, baseline, ci_low, ci_high, p_value = found[key]
+        rows.append((*key, len(samples[key].values), mean, baseline, ci_low, ci_high, p_value))
+    table = pd.DataFrame(rows, columns=SIGNIFICANCE_COLUMNS[:-2])
+    table['p_adjusted'] = adjust_pvalues(table['p_value'], correction)
+    table['significant'] = table['p_adjusted'] < alpha
+    return table
@@ -0,0 +1,118 @@
+"""
+Daily OHLCV sources
+
+A source is anything with `history(symbol, period=None, start=None)` returning a
+DataFrame of Open/High/Low/Close/Volume indexed by date, the same shape as
+yfinance's Ticker.history. OHLCVCache implements it too, so sources stack.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+
+import pandas as pd
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_PERIOD_RE = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def period_start(period, now=None):
+    """First timestamp covered by a yfinance-style period ('5d', '6mo', '2y', 'max')"""
+    if period is None or period == 'max':
+        return None
+    match = _PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    offset = {
+        'd': pd.DateOffset(days=count),
+        'wk': pd.DateOffset(weeks=count),
+        'mo': pd.DateOffset(months=count),
+        'y': pd.DateOffset(years=count),
+    }[unit]
+    now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+    return now.normalize() - offset
+
+
+def select_range(df, period=None, start=None, now=None):
+    """Rows of df from `start` (a date) or covering `period`"""
+    if start is not None:
+        cutoff = pd.Timestamp(start)
+    else:
+        cutoff = period_start(period, now)
+    if cutoff is None or len(df) == 0:
+        return df
+    if df.index.tz is not None:
+        cutoff = cutoff.tz_localize(df.index.tz) if cutoff.tz is None else cutoff.tz_convert(df.index.tz)
+    # Compare calendar dates so a date-only start matches bars stamped mid-day
+    return df[df.index.normalize() >= cutoff.normalize()]
+
+
+class YFinanceFetcher:
+    """Daily bars from Yahoo Finance"""
+
+    def history(self, symbol, period=None, start=None):
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            return ticker.history(start=pd.Timestamp(start).strftime('%Y-%m-%d'))
+        return ticker.history(period=period or 'max')
+
+
+class LocalFetcher:
+    """
+    Reads <directory>/<symbol>.csv (Date,Open,High,Low,Close,Volume) - fixture/offline source.
+
+    Periods count back from `now`, or from the file's last bar when it is not given.
+    """
+
+    def __init__(self, directory, tz=None, now=None):
+        self.directory = directory
+        self.tz = tz
+        self.now = now
+
+    def history(self, symbol, period=None, start=None):
+        path = os.path.join(self.directory, f"{symbol}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index)
+        if self.tz is not None and df.index.tz is None:
+            df.index = df.index.tz_localize(self.tz)
+        now = self.now if self.now is not None else (df.index[-1] if len(df) else None)
+        return select_range(df[OHLCV_COLUMNS], period, start, now)
+
+
+class SimulatedFetcher:
+    """
+    Wraps a source with network-like latency and random failures - a fake for
+    exercising the bulk downloader without touching yfinance.
+
+    Each call sleeps `latency` seconds (plus up to `jitter`) and raises
+    ConnectionError with probability `failure_rate`; symbols in `always_fail`
+    never succeed. Draws are seeded so a run is reproducible.
+    """
+
+    def __init__(self, source, latency=0.05, jitter=0.0, failure_rate=0.0, always_fail=(), seed=0):
+        self.source = source
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.always_fail = set(always_fail)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def history(self, symbol, period=None, start=None):
+        with self.lock:
+            self.calls += 1
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            failed = self.rng.random() < self.failure_rate
+        time.sleep(delay)
+        if failed or symbol in self.always_fail:
+            raise ConnectionError(f"simulated failure fetching {symbol}")
+        return self.source.history(symbol, period=period, start=start)
@@ -0,0 +1,219 @@
+"""
+Mergeable streaming statistics
+
+OutcomeStats replaces the per-event Python lists the analyzers used to keep:
+it holds a fixed handful of numbers whatever the event count, merges across
+shards (Chan et al.'s parallel variance update) and round-trips through JSON.
+"""
+
+import math
+
+import numpy as np
+
+
+class HistogramSketch:
+    """
+    Fixed-bin histogram for approximate quantiles of % returns.
+
+    Values outside [low, high) land in the under/overflow counts. Two sketches
+    with the same bins merge exactly by adding counts.
+    """
+
+    __slots__ = ('low', 'high', 'counts', 'under', 'over')
+
+    def __init__(self, low=-20.0, high=20.0, bins=800):
+        self.low = low
+        self.high = high
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.under = 0
+        self.over = 0
+
+    @property
+    def width(self):
+        return (self.high - self.low) / len(self.counts)
+
+    def add_array(self, values):
+        values = values[~np.isnan(values)]
+        self.under += int((values < self.low).sum())
+        self.over += int((values >= self.high).sum())
+        inside = values[(values >= self.low) & (values < self.high)]
+        bins = np.minimum(((inside - self.low) / self.width).astype(np.int64), len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+
+    def merge(self, other):
+        if (other.low, other.high, len(other.counts)) != (self.low, self.high, len(self.counts)):
+            raise ValueError("cannot merge sketches with different bins")
+        self.counts += other.counts
+        self.under += other.under
+        self.over += other.over
+
+    def quantile(self, q):
+        """Approximate q-quantile (0..1), interpolating inside the bin; clamps to the range ends"""
+        total = self.under + int(self.counts.sum()) + self.over
+        if total == 0:
+            return math.nan
+        rank = q * total
+        if rank <= self.under:
+            return self.low
+        cumulative = self.under + np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, rank))
+        if i >= len(self.counts):
+            return self.high
+        before = cumulative[i] - self.counts[i]
+        fraction = (rank - before) / self.counts[i] if self.counts[i] else 0.0
+        return self.low + (i + fraction) * self.width
+
+    def copy(self):
+        sketch = HistogramSketch(self.low, self.high, len(self.counts))
+        sketch.merge(self)
+        return sketch
+
+    def to_dict(self):
+        nonzero = np.flatnonzero(self.counts)
+        return {'low': self.low, 'high': self.high, 'bins': len(self.counts),
+                'under': self.under, 'over': self.over,
+                'index': nonzero.tolist(), 'counts': self.counts[nonzero].tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls(d['low'], d['high'], d['bins'])
+        sketch.counts[d['index']] = d['counts']
+        sketch.under = d['under']
+        sketch.over = d['over']
+        return sketch
+
+
+class OutcomeStats:
+    """
+    Count, sum, Welford/Chan variance and positive count of one event outcome.
+
+    `count` includes NaN outcomes, which poison the mean like statistics.mean
+    on the old lists did; the positive rate is over all `count` outcomes.
+    """
+
+    __slots__ = ('count', 'nan', 'total', 'm2', 'positive', 'sketch')
+
+    def __init__(self, sketch=False):
+        self.count = 0
+        self.nan = 0
+        self.total = 0.0
+        self.m2 = 0.0
+        self.positive = 0
+        self.sketch = HistogramSketch() if sketch else None
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def valid(self):
+        return self.count - self.nan
+
+    @property
+    def mean(self):
+        if self.nan or not self.valid:
+            return math.nan
+        return self.total / self.valid
+
+    @property
+    def variance(self):
+        """Sample variance of the non-NaN outcomes"""
+        return self.m2 / (self.valid - 1) if self.valid > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def positive_rate(self):
+        return self.positive / self.count * 100 if self.count else math.nan
+
+    def add(self, value):
+        self.add_array(np.array([value], dtype=np.float64))
+
+    def add_array(self, values):
+        """Fold a batch of outcomes in (one vectorized pass, then a Chan merge)"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        missing = np.isnan(values)
+        valid = values[~missing]
+        batch = OutcomeStats()
+        batch.count = len(values)
+        batch.nan = int(missing.sum())
+        batch.positive = int((valid > 0).sum())
+        if len(valid):
+            batch.total = float(valid.sum())
+            batch.m2 = float(((valid - batch.total / len(valid)) ** 2).sum())
+        if self.sketch is not None:
+            self.sketch.add_array(values)
+        self._combine(batch)
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. another shard's) into this one"""
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        self._combine(other)
+
+    def _combine(self, other):
+        n_a, n_b = self.valid, other.valid
+        if n_b:
+            if n_a:
+                delta = other.total / n_b - self.total / n_a
+                self.m2 += other.m2 + delta * delta * n_a * n_b / (n_a + n_b)
+            else:
+                self.m2 = other.m2
+            self.total += other.total
+        self.count += other.count
+        self.nan += other.nan
+        self.positive += other.positive
+
+    def copy(self):
+        stats = OutcomeStats()
+        stats.merge(self)
+        stats.sketch = self.sketch.copy() if self.sketch is not None else None
+        return stats
+
+    def to_dict(self):
+        d = {'count': self.count, 'nan': self.nan, 'total': self.total, 'm2': self.m2,
+             'positive': self.positive}
+        if self.sketch is not None:
+            d['sketch'] = self.sketch.to_dict()
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        stats = cls()
+        stats.count = d['count']
+        stats.nan = d['nan']
+        stats.total = d['total']
+        stats.m2 = d['m2']
+        stats.positive = d['positive']
+        if 'sketch' in d:
+            stats.sketch = HistogramSketch.from_dict(d['sketch'])
+        return stats
+
+    @classmethod
+    def merged(cls, parts):
+        """A new accumulator combining `parts` in order"""
+        result = parts[0].copy()
+        for part in parts[1:]:
+            result.merge(part)
+        return result
+
+
+def results_to_dict(results):
+    """JSON-ready copy of an analyzer results dict (accumulators become dicts)"""
+    if isinstance(results, dict):
+        return {key: results_to_dict(value) for key, value in results.items()}
+    if isinstance(results, OutcomeStats):
+        return {'__stats__': results.to_dict()}
+    return results
+
+
+def results_from_dict(d):
+    """Inverse of results_to_dict"""
+    if isinstance(d, dict):
+        if '__stats__' in d:
+            return OutcomeStats.from_dict(d['__stats__'])
+        return {key: results_from_dict(value) for key, value in d.items()}
+    return d
@@ -0,0 +1,71 @@
+"""
+Run-length encoded up/down streaks
+
+Computed in one O(n) pass per symbol: every bar gets the signed length of the
+run of same-direction returns ending on it, so "N or more up days in a row" is
+a single comparison for any N.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# (label, low, high) buckets of the cumulative % move over the streak
+STREAK_MAGNITUDE_BUCKETS = [
+    ('<2%', 0, 2),
+    ('2-5%', 2, 5),
+    ('5-10%', 5, 10),
+    ('>10%', 10, np.inf),
+]
+
+
+def streak_lengths(returns):
+    """
+    Signed length of the up (+) / down (-) run ending at each bar; 0 on flat or NaN bars.
+
+    Works down axis 0, so a (dates x symbols) matrix gets one run index per symbol.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    sign = np.zeros(r.shape, dtype=np.int64)
+    sign[r > 0] = 1
+    sign[r < 0] = -1
+    if len(sign) == 0:
+        return sign
+
+    new_run = np.empty(sign.shape, dtype=bool)
+    new_run[0] = True
+    new_run[1:] = sign[1:] != sign[:-1]
+    rows = np.arange(len(sign)).reshape((-1,) + (1,) * (sign.ndim - 1))
+    run_start = np.maximum.accumulate(np.where(new_run, rows, 0), axis=0)
+    return (rows - run_start + 1) * sign
+
+
+def trailing_moves(returns, max_length):
+    """{k: compounded % move over the last k bars} for k = 2..max_length (Series or DataFrame)"""
+    log_growth = np.log1p(returns.fillna(0).to_numpy() / 100)
+    cum = np.concatenate([np.zeros((1,) + log_growth.shape[1:]), np.cumsum(log_growth, axis=0)])
+    moves = {}
+    for k in range(2, max_length + 1):
+        move = np.full(log_growth.shape, np.nan)
+        move[k - 1:] = np.expm1(cum[k:] - cum[:-k]) * 100
+        moves[k] = _like(returns, move)
+    return moves
+
+
+@lru_cache(maxsize=None)
+def streak_features(max_length):
+    """Feature builder adding 'Streak' plus 'Streak_Move_<k>' columns for the event engine"""
+    def features(cols):
+        extra = {'Streak': _like(cols['Returns'], streak_lengths(cols['Returns']))}
+        for k, move in trailing_moves(cols['Returns'], max_length).items():
+            extra[f'Streak_Move_{k}'] = move
+        return extra
+    return features
+
+
+def _like(template, values):
+    """Wrap values with the index (and columns) of a Series/DataFrame"""
+    if isinstance(template, pd.DataFrame):
+        return pd.DataFrame(values, index=template.index, columns=template.columns)
+    return pd.Series(values, index=template.index)
@@ -0,0 +1,110 @@
+"""
+Threshold/horizon parameter sweeps
+
+A sweep family is one signal (gap %, volume ratio, intraday wick %) compared
+against a grid of thresholds, optionally with a fixed side condition (up day,
+closed red, ...). The family's candidate bars are sorted by signal once;
+suffix sums of the outcome, its square and its sign over that order then give
+count, mean, hit rate and a confidence interval for every threshold with one
+binary search each, for every horizon.
+
+Unlike event_study, bars whose outcome is NaN are left out of a grid point.
+"""
+
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from patterns.events import as_features
+
+# name: family label in the output table
+# signal: function(cols) -> (dates x symbols) values compared with each threshold
+# thresholds: grid of threshold magnitudes
+# side: 'above' (signal >= t) or 'below' (signal <= -t)
+# condition: function(cols) -> boolean mask every event must also satisfy
+# start / min_rows: bars skipped at the start of each symbol / shortest symbol used
+Sweep = namedtuple('Sweep', ['name', 'signal', 'thresholds', 'side', 'condition', 'start', 'min_rows'],
+                   defaults=['above', None, 1, 10])
+
+SWEEP_COLUMNS = ['sweep', 'threshold', 'horizon', 'count', 'mean', 'std', 'hit_rate', 'ci_low', 'ci_high']
+
+
+def threshold_grid(low, high, step):
+    """Evenly spaced thresholds from low to high inclusive"""
+    return tuple(np.round(np.arange(low, high + step / 2, step), 6).tolist())
+
+
+def suffix_sums(values):
+    """s[i] = values[i:].sum() for i in 0..n (s[n] = 0)"""
+    return np.concatenate([np.cumsum(values[::-1])[::-1], [0.0]])
+
+
+def run_sweeps(data, sweeps, horizons, method='compound', confidence=0.95, min_count=1):
+    """
+    Tidy DataFrame with one row per (sweep, threshold, horizon):
+    count, mean, std and hit rate (% positive) of the forward returns of every
+    bar at or beyond the threshold, plus a normal-approximation confidence
+    interval for the mean. Grid points with fewer than `min_count` events are dropped.
+
+    data is a Panel or a FeatureSet (forward returns are shared through it).
+    """
+    data = as_features(data)
+    panel = data.panel
+    cols = data.cols
+    position = data.positions
+    lengths = panel.lengths
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    tables = []
+    for spec in sweeps:
+        signal = np.asarray(spec.signal(cols), dtype=np.float64)
+        sign = -1.0 if spec.side == 'below' else 1.0
+        signal = signal * sign
+        with np.errstate(invalid='ignore'):
+            candidates = (position >= spec.start) & (lengths >= spec.min_rows) & ~np.isnan(signal)
+        if spec.condition is not None:
+            candidates &= np.asarray(spec.condition(cols), dtype=bool)
+
+        # Sort the family's candidate bars by signal once, for every horizon
+        rows, symbols = np.nonzero(candidates)
+        order = np.argsort(signal[rows, symbols], kind='stable')
+        rows, symbols = rows[order], symbols[order]
+        ordered = signal[rows, symbols]
+        bars_left = lengths[symbols] - position[rows, symbols] - 1
+        thresholds = np.asarray(spec.thresholds, dtype=np.float64)
+        first = np.searchsorted(ordered, thresholds, side='left')
+
+        for days in horizons:
+            outcome = data.forward(method, days)[rows, symbols]
+            valid = (bars_left >= days) & ~np.isnan(outcome)
+            # Centre on the overall mean so the sum of squares stays well conditioned
+            shift = outcome[valid].mean() if valid.any() else 0.0
+            centred = np.where(valid, outcome - shift, 0.0)
+            count = suffix_sums(valid.astype(np.float64))[first]
+            total = suffix_sums(centred)[first]
+            squares = suffix_sums(centred * centred)[first]
+            positive = suffix_sums((valid & (outcome > 0)).astype(np.float64))[first]
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / count
+                variance = (squares - total * mean) / (count - 1)
+                std = np.sqrt(np.where(count > 1, np.maximum(variance, 0.0), np.nan))
+                half = z * std / np.sqrt(count)
+                tables.append(pd.DataFrame({
+                    'sweep': spec.name,
+                    'threshold': thresholds * sign,
+                    'horizon': days,
+                    'count': count.astype(np.int64),
+                    'mean': np.where(count > 0, mean + shift, np.nan),
+                    'std': std,
+                    'hit_rate': np.where(count > 0, positive / count * 100, np.nan),
+                    'ci_low': mean + shift - half,
+                    'ci_high': mean + shift + half,
+                }))
+
+    if not tables:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+    table = pd.concat(tables, ignore_index=True)
+    return table[table['count'] >= min_count].reset_index(drop=True)
@@ -0,0 +1,103 @@
+"""
+Seeded synthetic daily OHLCV
+
+SyntheticFetcher is a source like LocalFetcher, so benchmarks run the real
+load/derive path without the network. Each symbol's bars mix a market factor,
+a sector factor, a slowly drifting trend and fat-tailed idiosyncratic noise;
+part of every move happens overnight, with occasional news gaps, and volume
+spikes on big moves. A symbol's series depends only on the seed, its name and
+its sector, never on which other symbols are generated.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from patterns.sources import select_range
+
+TRADING_DAYS_PER_YEAR = 252
+END_DATE = '2024-12-31'
+
+
+def synthetic_universe(count, known=()):
+    """`count` symbols: the `known` ones first, then SYN0001.NS, SYN0002.NS, ..."""
+    symbols = list(known)[:count]
+    symbols += [f"SYN{i:04d}.NS" for i in range(1, count - len(symbols) + 1)]
+    return symbols
+
+
+class SyntheticFetcher:
+    """
+    Deterministic bars for any symbol over `years` of trading days.
+
+    sectors maps symbol -> sector name; symbols in the same sector share a
+    factor. Every fifth symbol (by name hash) lists part-way through the range.
+    With `missing` > 0 each symbol also lacks a bar on that fraction of its
+    trading days (halts, feed gaps), so a panel of several symbols has dates
+    inside a symbol's history it has no bar for.
+    """
+
+    def __init__(self, years=2, seed=0, sectors=None, tz='Asia/Kolkata', end=END_DATE, missing=0.0):
+        self.seed = seed
+        self.sectors = sectors or {}
+        self.missing = missing
+        self.dates = pd.bdate_range(end=end, periods=int(years * TRADING_DAYS_PER_YEAR), tz=tz, name='Date')
+        rng = np.random.default_rng([seed, 0])
+        self.market = rng.standard_t(5, len(self.dates)) * 0.8
+        self._sector_factors = {}
+
+    def _sector_factor(self, sector):
+        if sector not in self._sector_factors:
+            rng = np.random.default_rng([self.seed, 1, _hash(sector)])
+            self._sector_factors[sector] = rng.standard_t(5, len(self.dates)) * 0.6
+        return self._sector_factors[sector]
+
+    def bars(self, symbol):
+        """The symbol's full OHLCV history"""
+        key = _hash(symbol)
+        rng = np.random.default_rng([self.seed, 2, key])
+        n_days = len(self.dates)
+        listed = int(rng.integers(n_days // 4, n_days // 2)) if key % 5 == 0 else 0
+        n = n_days - listed
+
+        # Trend: an AR(1) drift that wanders between up and down regimes
+        drift = pd.Series(rng.normal(0, 2.0, n)).ewm(alpha=0.01, adjust=False).mean().to_numpy()
+        sector = self.sectors.get(symbol, f"#{key % 16}")
+        beta = rng.uniform(0.6, 1.4)
+        noise = rng.standard_t(4, n) * rng.uniform(0.8, 2.0)
+        returns = drift + beta * self.market[listed:] + self._sector_factor(sector)[listed:] + noise
+        news = rng.random(n) < 0.01
+        returns[news] += rng.choice([-1, 1], news.sum()) * rng.uniform(3, 8, news.sum())
+        returns = np.clip(returns, -19, 19)
+
+        # Part of each day's move lands overnight; news moves mostly gap
+        overnight = np.where(news, rng.uniform(0.6, 1.0, n), rng.uniform(0.0, 0.4, n))
+        gap = overnight * returns + rng.normal(0, 0.3, n)
+        close = 100 * rng.uniform(0.5, 20) * np.cumprod(1 + returns / 100)
+        prev_close = np.r_[close[0] / (1 + returns[0] / 100), close[:-1]]
+        open_ = prev_close * (1 + gap / 100)
+        wick = np.abs(rng.normal(0, 0.6, (2, n))) / 100
+        high = np.maximum(open_, close) * (1 + wick[0])
+        low = np.minimum(open_, close) * (1 - wick[1])
+
+        # Volume: a lognormal base, heavier on big moves, plus rare spikes
+        base = rng.lognormal(rng.uniform(11, 15), 0.35, n)
+        spikes = np.where(rng.random(n) < 0.02, rng.uniform(2, 5, n), 1.0)
+        volume = np.round(base * (1 + np.abs(returns) / 2) * spikes)
+
+        bars = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+                            index=self.dates[listed:])
+        if self.missing:
+            # Own stream, so the bars that remain are the same as without gaps
+            keep = np.random.default_rng([self.seed, 3, key]).random(n) >= self.missing
+            keep[0] = True
+            bars = bars[keep]
+        return bars
+
+    def history(self, symbol, period=None, start=None):
+        return select_range(self.bars(symbol), period, start, now=self.dates[-1])
+
+
+def _hash(text):
+    return zlib.crc32(text.encode())
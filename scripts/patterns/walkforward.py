@@ -0,0 +1,104 @@
+"""
+Walk-forward (out-of-sample) evaluation of the patterns
+
+The history is split into rolling train/test windows of panel rows. Rather
+than re-running the analyzers per window, every pattern's events are reduced
+once to per-date prefix sums of count, outcome sum and positive count; each
+window's statistics are then a difference of two prefix entries, for every
+pattern at once.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Row bounds [start, end) into the panel's dates
+Window = namedtuple('Window', ['train_start', 'train_end', 'test_start', 'test_end'])
+
+WINDOW_COLUMNS = ['analyzer', 'pattern', 'outcome', 'window', 'test_start',
+                  'train_count', 'train_mean', 'train_hit_rate',
+                  'test_count', 'test_mean', 'test_hit_rate']
+
+SUMMARY_COLUMNS = ['analyzer', 'pattern', 'outcome', 'windows', 'train_mean', 'test_mean',
+                   'retained', 'sign_agreement', 'test_trend', 'test_hit_rate', 'hit_rate_std']
+
+
+def walk_forward_windows(n_rows, train, test, step=None, embargo=0):
+    """
+    Rolling windows over n_rows dates: `train` rows, `embargo` rows skipped
+    (so train outcomes cannot overlap the test period), then `test` rows;
+    advanced by `step` rows (default: test).
+    """
+    step = step or test
+    windows = []
+    start = 0
+    while start + train + embargo + test <= n_rows:
+        test_start = start + train + embargo
+        windows.append(Window(start, start + train, test_start, test_start + test))
+        start += step
+    return windows
+
+
+def prefix_sums(samples, n_rows):
+    """(patterns, 3, n_rows + 1) running totals of event count, outcome sum and positive count by date"""
+    totals = np.zeros((len(samples), 3, n_rows + 1))
+    for i, sample in enumerate(samples):
+        totals[i, 0, 1:] = np.cumsum(np.bincount(sample.rows, minlength=n_rows))
+        totals[i, 1, 1:] = np.cumsum(np.bincount(sample.rows, weights=sample.values, minlength=n_rows))
+        totals[i, 2, 1:] = np.cumsum(np.bincount(sample.rows, weights=sample.values > 0, minlength=n_rows))
+    return totals
+
+
+def _window_stats(totals, start, end):
+    count, total, positive = (totals[:, :, end] - totals[:, :, start]).T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return count, total / count, positive / count * 100
+
+
+def run_walk_forward(samples, dates, windows):
+    """
+    Tidy DataFrame of train and test statistics per (analyzer, pattern,
+    outcome, window). samples maps (analyzer, pattern, outcome) -> EventSample.
+    """
+    keys = list(samples)
+    totals = prefix_sums([samples[key] for key in keys], len(dates))
+    frames = []
+    for number, window in enumerate(windows, 1):
+        train = _window_stats(totals, window.train_start, window.train_end)
+        test = _window_stats(totals, window.test_start, window.test_end)
+        frame = pd.DataFrame(keys, columns=WINDOW_COLUMNS[:3])
+        frame['window'] = number
+        frame['test_start'] = dates[window.test_start].date()
+        for prefix, (count, mean, hit_rate) in (('train', train), ('test', test)):
+            frame[f'{prefix}_count'] = count.astype(np.int64)
+            frame[f'{prefix}_mean'] = mean
+            frame[f'{prefix}_hit_rate'] = hit_rate
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=WINDOW_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarize(table, min_count=30):
+    """
+    Stability and decay of each pattern over the windows where both train and
+    test have at least `min_count` events:
+
+    retained - event-weighted test mean / train mean (1 = edge fully holds up)
+    sign_agreement - % of windows whose test mean has the train mean's sign
+    test_trend - least-squares slope of the test mean per window (decay < 0
+                 for a positive edge)
+    """
+    usable = table[(table['train_count'] >= min_count) & (table['test_count'] >= min_count)]
+    rows = []
+    for key, group in usable.groupby(['analyzer', 'pattern', 'outcome'], sort=False):
+        train_mean = np.average(group['train_mean'], weights=group['train_count'])
+        test_mean = np.average(group['test_mean'], weights=group['test_count'])
+        agree = np.sign(group['train_mean']) == np.sign(group['test_mean'])
+        trend = np.polyfit(group['window'], group['test_mean'], 1)[0] if len(group) > 1 else np.nan
+        rows.append((*key, len(group), train_mean, test_mean,
+                     test_mean / train_mean if train_mean else np.nan,
+                     agree.mean() * 100, trend, group['test_hit_rate'].mean(),
+                     group['test_hit_rate'].std() if len(group) > 1 else np.nan))
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)